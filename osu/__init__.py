@@ -1,3 +1,16 @@
 __version__ = '1.0.0'
 
 from .osu import *
+from .ratelimit import *
+from .keys import *
+from .cache import *
+from .store import *
+from .crawler import *
+from .frames import *
+from .calllog import *
+from .metrics import *
+from .scheduler import *
+from .resilience import *
+from .replay import *
+from .replaycache import *
+from .tracker import *
@@ -0,0 +1,298 @@
+'''Reads call logs written by `CallLog` and reports latency, errors and rate limit utilisation
+
+Usage: `osu-calllog [--rate 60] [--json] LOG [LOG ...]`, pass rotated logs oldest first.'''
+
+import argparse
+
+import json
+
+from bisect import bisect_left
+
+from collections import deque, namedtuple
+
+import math
+
+import sys
+
+
+class CallRecord(namedtuple('CallRecord', ['callID', 'time', 'path', 'parameters', 'status', 'elapsed'])):
+    '''One call of a call log, `status` and `elapsed` are `None` for calls that failed before a response'''
+
+    @property
+    def failed(self):
+        return self.status != 200
+
+
+def _optional(value, cast):
+    return cast(value) if value not in ('', None) else None
+
+
+def parseLine(line):
+    '''Parses a text or JSON lines call log line, returns `None` for headers and blank lines'''
+    line = line.rstrip('\n')
+
+    if not line or line.startswith('callID|'):
+        return None
+
+    if line.startswith('{'):
+        record = json.loads(line)
+        return CallRecord(int(record['callID']), float(record['time']), record['path'], record['parameters'],
+                          _optional(record['status'], int), _optional(record['elapsed'], float))
+
+    callID, epochTime, path, rest = line.split('|', 3)
+    parameters, status, elapsed = rest.rsplit('|', 2)
+
+    return CallRecord(int(callID, 16), float(epochTime), path, parameters.replace('\\|', '|'),
+                      _optional(status, int), _optional(elapsed, float))
+
+
+def readCallLogs(paths):
+    '''Yields the records of every log in `paths` one line at a time'''
+    for path in paths:
+        with open(path, 'r') as f:
+            for line in f:
+                record = parseLine(line)
+                if record is not None:
+                    yield record
+
+
+class LatencyHistogram:
+    '''Fixed log scale histogram of latencies from 1ms to about 2 minutes, percentiles are bucket upper bounds'''
+
+    BOUNDS = tuple(0.001 * 1.25 ** i for i in range(53))
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, seconds):
+        self.counts[bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    def percentile(self, p):
+        if not self.count:
+            return 0
+
+        rank = math.ceil(self.count * p / 100)
+
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.BOUNDS[i], self.max) if i < len(self.BOUNDS) else self.max
+
+        return self.max
+
+    def buckets(self):
+        '''Pairs of `(upper bound, count)` for every non empty bucket, the last bound is `inf`'''
+        bounds = self.BOUNDS + (math.inf,)
+        return [(bounds[i], count) for i, count in enumerate(self.counts) if count]
+
+
+class EndpointStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.statuses = {}
+        self.latency = LatencyHistogram()
+
+    def add(self, record):
+        self.calls += 1
+        self.statuses[record.status] = self.statuses.get(record.status, 0) + 1
+
+        if record.failed:
+            self.errors += 1
+
+        if record.elapsed is not None:
+            self.latency.add(record.elapsed)
+
+    @property
+    def errorRate(self):
+        return self.errors / self.calls if self.calls else 0
+
+
+class CallLogReport:
+    '''Streams call records and keeps constant size aggregates of them'''
+
+    def __init__(self, rate=60, window=60):
+        self.rate = rate
+        self.window = window
+
+        self.total = EndpointStats()
+        self.endpoints = {}
+
+        self.first = None
+        self.last = None
+
+        # Calls per minute -> number of minutes with that many calls
+        self.perMinute = {}
+        self._minute = None
+        self._minuteCalls = 0
+
+        self._recent = deque()
+        self.saturated = []
+        self._saturatedSince = None
+        self._peak = 0
+
+    def add(self, record):
+        self.total.add(record)
+        self.endpoints.setdefault(record.path, EndpointStats()).add(record)
+
+        if self.first is None:
+            self.first = record.time
+        self.last = record.time
+
+        self._countMinute(record.time)
+        self._countWindow(record.time)
+
+    def _countMinute(self, epochTime):
+        minute = int(epochTime // 60)
+
+        if minute != self._minute:
+            self._closeMinute()
+            self._minute = minute
+
+        self._minuteCalls += 1
+
+    def _closeMinute(self):
+        if self._minuteCalls:
+            self.perMinute[self._minuteCalls] = self.perMinute.get(self._minuteCalls, 0) + 1
+        self._minuteCalls = 0
+
+    def _countWindow(self, epochTime):
+        recent = self._recent
+        recent.append(epochTime)
+        while recent[0] <= epochTime - self.window:
+            recent.popleft()
+
+        if len(recent) >= self.rate:
+            if self._saturatedSince is None:
+                self._saturatedSince = max(recent[0], self.saturated[-1][1]) if self.saturated else recent[0]
+                self._peak = 0
+            self._peak = max(self._peak, len(recent))
+        elif self._saturatedSince is not None:
+            self._closeWindow(epochTime)
+
+    def _closeWindow(self, epochTime):
+        self.saturated.append((self._saturatedSince, epochTime, self._peak))
+        self._saturatedSince = None
+
+    def finish(self):
+        self._closeMinute()
+
+        if self._saturatedSince is not None:
+            self._closeWindow(self.last)
+
+        return self
+
+    @property
+    def activeMinutes(self):
+        return sum(self.perMinute.values())
+
+    @property
+    def callsPerMinute(self):
+        return self.total.calls / self.activeMinutes if self.activeMinutes else 0
+
+    @property
+    def utilisation(self):
+        return self.callsPerMinute / self.rate
+
+    def asDict(self):
+        def endpoint(stats):
+            return {'calls': stats.calls,
+                    'errors': stats.errors,
+                    'errorRate': stats.errorRate,
+                    'statuses': {str(k): v for k, v in stats.statuses.items()},
+                    'latency': {'mean': stats.latency.mean,
+                                'p50': stats.latency.percentile(50),
+                                'p90': stats.latency.percentile(90),
+                                'p99': stats.latency.percentile(99),
+                                'max': stats.latency.max,
+                                'histogram': [[bound if bound != math.inf else None, count]
+                                              for bound, count in stats.latency.buckets()]}}
+
+        return {'first': self.first,
+                'last': self.last,
+                'rate': self.rate,
+                'total': endpoint(self.total),
+                'endpoints': {path: endpoint(stats) for path, stats in sorted(self.endpoints.items())},
+                'activeMinutes': self.activeMinutes,
+                'callsPerMinute': self.callsPerMinute,
+                'utilisation': self.utilisation,
+                'busiestMinute': max(self.perMinute, default=0),
+                'saturatedWindows': [{'start': start, 'end': end, 'peak': peak}
+                                     for start, end, peak in self.saturated]}
+
+    def format(self, histograms=False):
+        lines = []
+
+        def ms(seconds):
+            return f'{seconds * 1000:.0f}ms'
+
+        header = f'{"endpoint":<20}{"calls":>8}{"errors":>8}{"err%":>7}{"mean":>9}{"p50":>9}{"p90":>9}{"p99":>9}{"max":>9}'
+        lines.append(header)
+        lines.append('-' * len(header))
+
+        for path, stats in sorted(self.endpoints.items()) + [('total', self.total)]:
+            latency = stats.latency
+            lines.append(f'{path:<20}{stats.calls:>8}{stats.errors:>8}{stats.errorRate * 100:>6.1f}%'
+                         f'{ms(latency.mean):>9}{ms(latency.percentile(50)):>9}{ms(latency.percentile(90)):>9}'
+                         f'{ms(latency.percentile(99)):>9}{ms(latency.max):>9}')
+
+            if histograms:
+                peak = max((count for _, count in latency.buckets()), default=1)
+                for bound, count in latency.buckets():
+                    bar = '#' * max(1, round(40 * count / peak))
+                    label = f'<= {ms(bound)}' if bound != math.inf else '> max bucket'
+                    lines.append(f'    {label:>14} {count:>8} {bar}')
+
+        lines.append('')
+        lines.append(f'active minutes: {self.activeMinutes}, calls per active minute: {self.callsPerMinute:.1f} '
+                     f'of {self.rate} ({self.utilisation * 100:.0f}%), busiest minute: {max(self.perMinute, default=0)}')
+
+        saturatedSeconds = sum(end - start for start, end, _ in self.saturated)
+        lines.append(f'saturated windows: {len(self.saturated)}, {saturatedSeconds:.0f}s in total')
+
+        for start, end, peak in sorted(self.saturated, key=lambda w: w[0] - w[1])[:10]:
+            lines.append(f'    {start:.0f} - {end:.0f} ({end - start:.0f}s, peak {peak} calls/{self.window}s)')
+
+        return '\n'.join(lines)
+
+
+def analyzeCallLogs(paths, rate=60):
+    '''Builds a `CallLogReport` of the logs in `paths`, oldest first'''
+    report = CallLogReport(rate)
+
+    for record in readCallLogs(paths):
+        report.add(record)
+
+    return report.finish()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='osu-calllog', description='Summarises osu! API call logs')
+    parser.add_argument('logs', nargs='+', help='call logs, rotated logs oldest first')
+    parser.add_argument('--rate', type=float, default=60, help='configured calls per minute')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    parser.add_argument('--histogram', action='store_true', help='print latency histograms per endpoint')
+    args = parser.parse_args(argv)
+
+    report = analyzeCallLogs(args.logs, args.rate)
+
+    if args.json:
+        json.dump(report.asDict(), sys.stdout, indent=2)
+        print()
+    else:
+        print(report.format(args.histogram))
+
+
+if __name__ == '__main__':
+    main()
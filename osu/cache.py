@@ -0,0 +1,142 @@
+from collections import OrderedDict
+
+import sys
+
+from time import monotonic
+
+from .osu import ApprovedStatus, requestKey
+
+
+__all__ = ['ResponseCache']
+
+
+def _sizeOf(obj):
+    '''Rough estimate of the memory used by a decoded JSON response'''
+    size = sys.getsizeof(obj)
+
+    if isinstance(obj, dict):
+        size += sum(_sizeOf(k) + _sizeOf(v) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_sizeOf(v) for v in obj)
+
+    return size
+
+
+class ResponseCache:
+    '''Memory bounded LRU cache of API responses with per endpoint TTLs
+
+    Cached responses are shared between callers and must be treated as read only.'''
+
+    TTLS = {'get_beatmaps': 300,
+            'get_user': 300,
+            'get_scores': 60,
+            'get_user_best': 300,
+            'get_user_recent': 15,
+            'get_replay': 86400}
+
+    PERMANENT = {ApprovedStatus.Ranked, ApprovedStatus.Approved, ApprovedStatus.Loved}
+
+    def __init__(self, maxBytes=64 * 1024 * 1024, ttls=None, defaultTTL=60, permanentTTL=7 * 86400):
+        self.maxBytes = maxBytes
+
+        self.ttls = dict(self.TTLS)
+        if ttls is not None:
+            self.ttls.update(ttls)
+
+        self.defaultTTL = defaultTTL
+        self.permanentTTL = permanentTTL
+
+        self._entries = OrderedDict()
+        self.currentBytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hitRate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0
+
+    @property
+    def stats(self):
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'entries': len(self._entries),
+                'bytes': self.currentBytes}
+
+    def ttlFor(self, path, parameters, response):
+        '''Seconds `response` stays fresh. Ranked, approved and loved beatmaps looked up directly
+        are kept for `permanentTTL` as they can no longer change'''
+        if path == 'get_beatmaps' and response and 'since' not in parameters and 'u' not in parameters:
+            if all(ApprovedStatus(int(row['approved'])) in self.PERMANENT for row in response):
+                return self.permanentTTL
+
+        return self.ttls.get(path, self.defaultTTL)
+
+    def get(self, path, parameters):
+        '''Returns the cached response or `None`'''
+        key = requestKey(path, parameters)
+
+        entry = self._entries.get(key)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires, size, response = entry
+
+        if expires <= monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+
+        return response
+
+    def put(self, path, parameters, response):
+        ttl = self.ttlFor(path, parameters, response)
+        if ttl <= 0:
+            return
+
+        size = _sizeOf(response)
+        if size > self.maxBytes:
+            return
+
+        key = requestKey(path, parameters)
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = (monotonic() + ttl, size, response)
+        self.currentBytes += size
+
+        while self.currentBytes > self.maxBytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.currentBytes -= size
+
+    def invalidate(self, path=None, **parameters):
+        '''Drops the entry for `path` called with `parameters`, every entry of `path` if no parameters
+        are given or everything if `path` is `None`'''
+        if path is None:
+            self._entries.clear()
+            self.currentBytes = 0
+        elif parameters:
+            key = requestKey(path, parameters)
+            if key in self._entries:
+                self._remove(key)
+        else:
+            for key in [key for key in self._entries if key[0] == path]:
+                self._remove(key)
@@ -0,0 +1,197 @@
+import asyncio
+
+import json
+
+import logging
+
+import os
+
+from time import time
+
+
+__all__ = ['CallLog']
+
+
+def _lastLine(path, chunk=4096):
+    '''Reads the last line of `path` from its end, `None` if it is empty'''
+    with open(path, 'rb') as f:
+        end = f.seek(0, os.SEEK_END)
+
+        data = b''
+        while end > 0:
+            start = max(0, end - chunk)
+            f.seek(start)
+            data = f.read(end - start) + data
+            end = start
+
+            lines = data.rstrip(b'\n').split(b'\n')
+            if len(lines) > 1 or start == 0:
+                return lines[-1].decode() or None
+
+    return None
+
+
+_logger = logging.getLogger('osu!api')
+
+
+class CallLog:
+    '''Log of every API call, written by a background task so calls never wait on the disk
+
+    `format` is `'text'`, the `|` separated format with a header, or `'jsonl'`, one JSON object per line.
+    The file is rotated to `path.1`, `path.2`, ... once it reaches `maxBytes` or is `rotateInterval` seconds old.
+    At most `queueSize` records wait to be written, further records and records that failed to be written
+    are counted in `dropped`.'''
+
+    HEADER = 'callID|epochTime|path|parameters|responseStatus|timeElapsed\n'
+
+    def __init__(self, path, format='text', maxBytes=None, rotateInterval=None, backupCount=5, queueSize=10000,
+                 batchSize=512):
+        if format not in ('text', 'jsonl'):
+            raise ValueError(f'Unknown call log format {format}')
+
+        self.path = path
+        self.format = format
+        self.maxBytes = maxBytes
+        self.rotateInterval = rotateInterval
+        self.backupCount = backupCount
+        self.queueSize = queueSize
+        self.batchSize = batchSize
+
+        self.dropped = 0
+
+        self._queue = None
+        self._writer = None
+        self._file = None
+        self._openedAt = None
+        self._size = 0
+
+        self.lastCallID = self._recoverCallID()
+
+    def _parseCallID(self, line):
+        if self.format == 'jsonl':
+            return int(json.loads(line)['callID'])
+        return int(line.split('|')[0], 16)
+
+    def _recoverCallID(self):
+        for path in (self.path, f'{self.path}.1'):
+            try:
+                line = _lastLine(path)
+            except FileNotFoundError:
+                continue
+
+            if line is None:
+                continue
+
+            try:
+                return self._parseCallID(line)
+            except (ValueError, KeyError):
+                continue
+
+        return -1
+
+    def formatRecord(self, callID, epochTime, path, parameters, status, elapsed):
+        if self.format == 'jsonl':
+            return json.dumps({'callID': callID, 'time': epochTime, 'path': path, 'parameters': parameters,
+                               'status': status, 'elapsed': elapsed}) + '\n'
+
+        escaped = '\\|'
+        status = '' if status is None else status
+        elapsed = '' if elapsed is None else elapsed
+
+        return f'{callID:x}|{epochTime}|{path}|{json.dumps(parameters).replace("|", escaped)}|{status}|{elapsed}\n'
+
+    def record(self, callID, epochTime, path, parameters, status=None, elapsed=None):
+        '''Queues a call to be written without blocking, `status` and `elapsed` are `None` for failed calls'''
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queueSize)
+
+        self._startWriter()
+
+        try:
+            self._queue.put_nowait(self.formatRecord(callID, epochTime, path, parameters, status, elapsed))
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def _startWriter(self):
+        # A writer that died is replaced so queued records never wait forever
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.ensure_future(self._drain())
+
+    async def _drain(self):
+        loop = asyncio.get_event_loop()
+
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batchSize and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                await loop.run_in_executor(None, self._write, batch)
+            except OSError as e:
+                # The batch is lost, the next one tries the file again
+                self.dropped += len(batch)
+                _logger.warning(f'Call log: writing {len(batch)} records to {self.path} failed with {e!r}')
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, records):
+        # Rotation is checked per record so a batch never carries the file far past `maxBytes`
+        for record in records:
+            if self._file is not None and self._shouldRotate():
+                self._rotate()
+
+            if self._file is None:
+                self._open()
+
+            self._file.write(record)
+            self._size += len(record.encode())
+
+        self._file.flush()
+
+    def _open(self):
+        self._file = open(self.path, 'a')
+        self._openedAt = time()
+        self._size = self._file.tell()
+
+        if self.format == 'text' and self._size == 0:
+            self._file.write(self.HEADER)
+            self._size += len(self.HEADER)
+
+    def _shouldRotate(self):
+        if self.maxBytes is not None and self._size >= self.maxBytes:
+            return True
+
+        return self.rotateInterval is not None and time() - self._openedAt >= self.rotateInterval
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+
+        for i in range(self.backupCount - 1, 0, -1):
+            if os.path.exists(f'{self.path}.{i}'):
+                os.replace(f'{self.path}.{i}', f'{self.path}.{i + 1}')
+
+        if self.backupCount > 0:
+            os.replace(self.path, f'{self.path}.1')
+        else:
+            os.remove(self.path)
+
+    async def flush(self):
+        '''Waits until every queued call is written'''
+        if self._queue is not None:
+            if not self._queue.empty():
+                self._startWriter()
+
+            await self._queue.join()
+
+    async def close(self):
+        await self.flush()
+
+        if self._writer is not None:
+            self._writer.cancel()
+            self._writer = None
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
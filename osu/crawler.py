@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+
+import json
+
+import os
+
+from .osu import Modes
+
+
+__all__ = ['BeatmapCrawler']
+
+
+class BeatmapCrawler:
+    '''Walks the whole beatmap catalogue through the `since` cursor of get_beatmaps, yielding
+    beatmaps (or raw rows if `raw`) as pages arrive. Meant to be iterated with `async for`
+
+    If `checkpoint` is a path the cursor is saved there after every page and restored on creation,
+    so an interrupted crawl resumes where it stopped. Rows of the page that was being processed
+    when the crawl stopped are yielded again.'''
+
+    DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+    START = datetime(2007, 1, 1)
+
+    def __init__(self, osuAPI, since=None, mode=None, includeConverted=False, raw=False, checkpoint=None, limit=500):
+        self.osuAPI = osuAPI
+
+        self.since = self.START if since is None else since
+        self.mode = mode
+        self.includeConverted = includeConverted
+        self.raw = raw
+        self.checkpoint = checkpoint
+        self.limit = limit
+
+        # Beatmap ids already yielded within a second of the cursor, the next page overlaps them
+        self.seen = {}
+
+        if checkpoint is not None and os.path.exists(checkpoint):
+            self.load()
+
+    @property
+    def state(self):
+        return {'since': self.since.strftime(self.DATE_FORMAT), 'seen': self.seen}
+
+    def load(self):
+        with open(self.checkpoint, 'r') as f:
+            state = json.load(f)
+
+        self.since = datetime.strptime(state['since'], self.DATE_FORMAT)
+        self.seen = {int(beatmapID): date for beatmapID, date in state['seen'].items()}
+
+    def save(self):
+        temp = self.checkpoint + '.tmp'
+
+        with open(temp, 'w') as f:
+            json.dump(self.state, f)
+
+        os.replace(temp, self.checkpoint)
+
+    def __aiter__(self):
+        return self.crawl()
+
+    async def crawl(self):
+        while True:
+            args = {'since': (self.since - timedelta(seconds=1)).strftime(self.DATE_FORMAT), 'limit': self.limit}
+
+            if self.mode is not None:
+                args['m'] = Modes(self.mode).value
+                if self.includeConverted and args['m'] != 0:
+                    args['a'] = 1
+
+            rows = await self.osuAPI._APICall('get_beatmaps', args)
+
+            converted = args['m'] if 'a' in args else None
+
+            for row in rows:
+                beatmapID = int(row['beatmap_id'])
+                if beatmapID in self.seen:
+                    continue
+
+                if self.raw:
+                    yield row
+                else:
+                    yield self.osuAPI._intern(self.osuAPI._liveBeatmaps, (beatmapID, converted),
+                                              self.osuAPI.beatmapCls, row)
+
+            self._advance(rows)
+
+            if self.checkpoint is not None:
+                self.save()
+
+            if len(rows) < self.limit:
+                return
+
+    def _advance(self, rows):
+        dated = [(row['approved_date'], int(row['beatmap_id'])) for row in rows if row['approved_date']]
+        if not dated:
+            return
+
+        cursor = max(dated)[0]
+        since = datetime.strptime(cursor, self.DATE_FORMAT)
+
+        if since <= self.since and len(rows) >= self.limit:
+            self.osuAPI.logger.warning(f'Crawler: a full page was approved at {cursor}, skipping a second ahead')
+            since = self.since + timedelta(seconds=1)
+
+        self.since = max(since, self.since)
+
+        boundary = (self.since - timedelta(seconds=1)).strftime(self.DATE_FORMAT)
+
+        seen = {beatmapID: date for beatmapID, date in self.seen.items() if date >= boundary}
+        seen.update((beatmapID, date) for date, beatmapID in dated if date >= boundary)
+
+        self.seen = seen
@@ -0,0 +1,226 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+__all__ = ['Frame', 'ScoreFrame', 'BeatmapFrame']
+
+
+def _requireNumpy():
+    if np is None:
+        raise ImportError('Frames require numpy, install it with `pip install osu[frames]`')
+
+
+def _value(o):
+    '''Value of an enum member or `Mods`, or `o` itself'''
+    return int(getattr(o, 'value', o))
+
+
+def _dates(values):
+    return np.array([v.replace(' ', 'T') if v else 'NaT' for v in values], dtype='datetime64[s]')
+
+
+class Frame:
+    '''Columnar container of API rows backed by NumPy arrays
+
+    `COLUMNS` lists `(column, field, dtype, missing)`, `missing` replaces absent or null fields.
+    Columns are available as items or attributes and indexing with a mask or indices returns a new frame.'''
+
+    COLUMNS = ()
+
+    def __init__(self, columns):
+        _requireNumpy()
+
+        self.columns = columns
+
+    @classmethod
+    def fromRows(cls, rows, **constants):
+        '''Builds a frame from raw API rows, `constants` fill fields the rows do not have'''
+        _requireNumpy()
+
+        rows = list(rows)
+
+        columns = {}
+        for column, field, dtype, missing in cls.COLUMNS:
+            if column in constants:
+                values = [constants[column]] * len(rows)
+            else:
+                values = [row.get(field) for row in rows]
+                values = [missing if v is None or v == '' else v for v in values]
+
+            if dtype == 'datetime64[s]':
+                columns[column] = _dates(values)
+            elif dtype == bool:
+                columns[column] = np.array([v == '1' or v is True for v in values], dtype=bool)
+            else:
+                columns[column] = np.array(values).astype(dtype) if values else np.empty(0, dtype=dtype)
+
+        return cls(columns)
+
+    @classmethod
+    def concat(cls, frames):
+        frames = list(frames)
+
+        return cls({column: np.concatenate([f.columns[column] for f in frames]) for column, *_ in cls.COLUMNS})
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()), ()))
+
+    def __getitem__(self, item):
+        if isinstance(item, str):
+            return self.columns[item]
+
+        return type(self)({column: values[item] for column, values in self.columns.items()})
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__['columns'][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def groupby(self, column):
+        '''Returns `{value: frame}` for every distinct value of `column`'''
+        keys, inverse = np.unique(self.columns[column], return_inverse=True)
+        order = np.argsort(inverse, kind='stable')
+        bounds = np.cumsum(np.bincount(inverse, minlength=len(keys)))[:-1]
+
+        return {key.item(): self[indices] for key, indices in zip(keys, np.split(order, bounds))}
+
+    def __repr__(self):
+        return f'{type(self).__name__}({len(self)} rows: {", ".join(self.columns)})'
+
+
+class ScoreFrame(Frame):
+    '''Columnar scores as returned by get_scores, get_user_best and get_user_recent'''
+
+    COLUMNS = (('score', 'score', 'int64', 0),
+               ('count300', 'count300', 'int32', 0),
+               ('count100', 'count100', 'int32', 0),
+               ('count50', 'count50', 'int32', 0),
+               ('countMiss', 'countmiss', 'int32', 0),
+               ('countKatu', 'countkatu', 'int32', 0),
+               ('countGeki', 'countgeki', 'int32', 0),
+               ('maxCombo', 'maxcombo', 'int32', 0),
+               ('perfect', 'perfect', bool, '0'),
+               ('mods', 'enabled_mods', 'int64', 0),
+               ('userID', 'user_id', 'int64', -1),
+               ('date', 'date', 'datetime64[s]', None),
+               ('rank', 'rank', '<U2', ''),
+               ('pp', 'pp', 'float64', 'nan'),
+               ('hasReplay', 'replay_available', bool, '0'),
+               ('scoreID', 'score_id', 'int64', -1),
+               ('beatmapID', 'beatmap_id', 'int64', -1))
+
+    # Hidden, flashlight and fade in turn S and SS silver
+    SILVER = 8 | 1024 | 1048576
+
+    def withMods(self, mods, exact=False):
+        '''Scores played with every mod of `mods`, or exactly `mods` if `exact`. `mods` takes any form
+        `Mods.getValue` does'''
+        # osu.py imports this module
+        from .osu import Mods
+
+        if exact:
+            return self[self.columns['mods'] == Mods.getValue(mods)]
+
+        return self[Mods.mask(self.columns['mods'], mods)]
+
+    def withoutMods(self, mods):
+        '''Scores played without any mod of `mods`'''
+        from .osu import Mods
+
+        return self[(self.columns['mods'] & Mods.getValue(mods)) == 0]
+
+    def accuracy(self, mode=0):
+        '''Accuracy between 0 and 1 of every score in `mode`, a `Modes` or its value'''
+        mode = _value(mode)
+        c = self.columns
+
+        n300, n100, n50, miss = (c[k].astype(np.float64) for k in ('count300', 'count100', 'count50', 'countMiss'))
+        katu, geki = c['countKatu'].astype(np.float64), c['countGeki'].astype(np.float64)
+
+        if mode == 0:
+            hit, total = 50 * n50 + 100 * n100 + 300 * n300, 300 * (n50 + n100 + n300 + miss)
+        elif mode == 1:
+            hit, total = 0.5 * n100 + n300, n100 + n300 + miss
+        elif mode == 2:
+            hit, total = n50 + n100 + n300, n50 + n100 + n300 + katu + miss
+        elif mode == 3:
+            hit = 50 * n50 + 100 * n100 + 200 * katu + 300 * (n300 + geki)
+            total = 300 * (n50 + n100 + katu + n300 + geki + miss)
+        else:
+            raise ValueError(f'Unknown mode {mode}')
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(total > 0, hit / total, np.nan)
+
+    def grade(self, mode=0):
+        '''Grade (`'XH'`, `'X'`, `'SH'`, `'S'`, `'A'`, `'B'`, `'C'` or `'D'`) of every score in `mode`'''
+        mode = _value(mode)
+        c = self.columns
+
+        accuracy = self.accuracy(mode)
+        silver = (c['mods'] & self.SILVER) != 0
+
+        if mode in (0, 1):
+            total = (c['count300'] + c['count100'] + c['count50'] + c['countMiss']).astype(np.float64)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                r300 = np.where(total > 0, c['count300'] / total, 0)
+                r50 = np.where(total > 0, c['count50'] / total, 0)
+            clean = c['countMiss'] == 0
+
+            conditions = [accuracy >= 1,
+                          (r300 > 0.9) & (r50 < 0.01) & clean,
+                          ((r300 > 0.8) & clean) | (r300 > 0.9),
+                          ((r300 > 0.7) & clean) | (r300 > 0.8),
+                          r300 > 0.6]
+        else:
+            thresholds = (0.98, 0.94, 0.9, 0.85) if mode == 2 else (0.95, 0.9, 0.8, 0.7)
+            conditions = [accuracy >= 1] + [accuracy > t for t in thresholds]
+
+        grades = np.select(conditions, ['X', 'S', 'A', 'B', 'C'], 'D').astype('<U2')
+        grades[silver & (grades == 'X')] = 'XH'
+        grades[silver & (grades == 'S')] = 'SH'
+
+        return grades
+
+    def groupbyBeatmap(self):
+        return self.groupby('beatmapID')
+
+    def groupbyUser(self):
+        return self.groupby('userID')
+
+
+class BeatmapFrame(Frame):
+    '''Columnar beatmaps as returned by get_beatmaps'''
+
+    COLUMNS = (('beatmapID', 'beatmap_id', 'int64', -1),
+               ('beatmapsetID', 'beatmapset_id', 'int64', -1),
+               ('approved', 'approved', 'int8', 0),
+               ('approvedDate', 'approved_date', 'datetime64[s]', None),
+               ('mode', 'mode', 'int8', 0),
+               ('creatorID', 'creator_id', 'int64', -1),
+               ('stars', 'difficultyrating', 'float64', 'nan'),
+               ('bpm', 'bpm', 'float64', 'nan'),
+               ('cs', 'diff_size', 'float32', 'nan'),
+               ('od', 'diff_overall', 'float32', 'nan'),
+               ('ar', 'diff_approach', 'float32', 'nan'),
+               ('hp', 'diff_drain', 'float32', 'nan'),
+               ('length', 'total_length', 'int32', 0),
+               ('drain', 'hit_length', 'int32', 0),
+               ('maxCombo', 'max_combo', 'int32', -1),
+               ('playcount', 'playcount', 'int64', 0),
+               ('passcount', 'passcount', 'int64', 0),
+               ('favorites', 'favourite_count', 'int64', 0))
+
+    def withStatus(self, *statuses):
+        '''Beatmaps with one of the `ApprovedStatus`es or their values'''
+        return self[np.isin(self.columns['approved'], [_value(s) for s in statuses])]
+
+    def passRate(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.columns['playcount'] > 0, self.columns['passcount'] / self.columns['playcount'], np.nan)
+
+    def groupbyBeatmapset(self):
+        return self.groupby('beatmapsetID')
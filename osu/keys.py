@@ -0,0 +1,107 @@
+from collections import deque
+
+from time import monotonic
+
+from .ratelimit import RateLimiter, SlidingWindowLimiter
+
+
+__all__ = ['PooledKey', 'KeyPool']
+
+
+class PooledKey:
+    '''An API key of a `KeyPool` with its own limiter and health'''
+
+    def __init__(self, key, limiter):
+        self.key = key
+        self.limiter = limiter
+
+        self.failures = 0
+        self.disabledUntil = 0
+
+    @property
+    def healthy(self):
+        return self.disabledUntil <= monotonic()
+
+    def __repr__(self):
+        return f'PooledKey({self.key[:4]}..., failures={self.failures}, healthy={self.healthy})'
+
+
+class KeyPool(RateLimiter):
+    '''Several API keys behind one `OsuAPI`, passed as its `key`
+
+    `keys` is an iterable of keys, each limited by `limiterCls(rate, period)`, or a mapping of keys to limiters.
+    Every call goes to the healthy key that has a free slot soonest. A key failing `failureThreshold`
+    calls in a row is taken out of rotation for `cooldown` seconds.'''
+
+    def __init__(self, keys, rate=60, period=60, limiterCls=SlidingWindowLimiter, failureThreshold=3, cooldown=60):
+        if not hasattr(keys, 'items'):
+            keys = {key: limiterCls(rate, period) for key in keys}
+
+        if not keys:
+            raise ValueError('A key pool needs at least one key')
+
+        super().__init__(sum(limiter.rate for limiter in keys.values()),
+                         max(limiter.period for limiter in keys.values()))
+
+        self.keys = [PooledKey(key, limiter) for key, limiter in keys.items()]
+        self._byKey = {pooled.key: pooled for pooled in self.keys}
+
+        self.failureThreshold = failureThreshold
+        self.cooldown = cooldown
+
+        # Keys whose slots were taken but not yet checked out by a call
+        self._granted = deque()
+
+    @property
+    def healthyKeys(self):
+        return [pooled for pooled in self.keys if pooled.healthy]
+
+    def _candidates(self):
+        healthy = self.healthyKeys
+        if healthy:
+            return healthy
+
+        # Every key is cooling down, use the one back soonest rather than stalling
+        return [min(self.keys, key=lambda pooled: pooled.disabledUntil)]
+
+    def tryAcquire(self):
+        pooled = min(self._candidates(), key=lambda pooled: pooled.limiter.timeUntilFree)
+
+        wait = pooled.limiter.tryAcquire()
+        if wait <= 0:
+            self._granted.append(pooled)
+
+        return wait
+
+    @property
+    def timeUntilFree(self):
+        return min(pooled.limiter.timeUntilFree for pooled in self._candidates())
+
+    def checkout(self):
+        '''Returns the key of the oldest slot taken by `acquire`'''
+        if self._granted:
+            return self._granted.popleft().key
+
+        return min(self._candidates(), key=lambda pooled: pooled.limiter.timeUntilFree).key
+
+    @property
+    def effectiveRate(self):
+        return sum(pooled.limiter.effectiveRate for pooled in self.healthyKeys)
+
+    def report(self, key, ok, status=None, elapsed=None):
+        '''Records whether a call made with `key` succeeded and passes its response on to the key's limiter'''
+        pooled = self._byKey[key]
+
+        pooled.limiter.feedback(status, elapsed)
+
+        if ok:
+            pooled.failures = 0
+            return
+
+        pooled.failures += 1
+        if pooled.failures >= self.failureThreshold:
+            pooled.disabledUntil = monotonic() + self.cooldown
+            pooled.failures = 0
+
+    def __repr__(self):
+        return f'KeyPool({len(self.healthyKeys)}/{len(self.keys)} keys healthy)'
@@ -0,0 +1,161 @@
+from bisect import bisect_left
+
+from contextlib import ExitStack, contextmanager
+
+from time import monotonic
+
+
+__all__ = ['Metrics']
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class Metric:
+    '''Base of the metric types, values are kept per tuple of label values'''
+    TYPE = None
+
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.values = {}
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} {self.TYPE}']
+        for labelValues, value in sorted(self.values.items()):
+            lines.append(f'{self.name}{_labels(self.labels, labelValues)} {value}')
+        return lines
+
+
+class Counter(Metric):
+    TYPE = 'counter'
+
+    def inc(self, *labelValues, amount=1):
+        self.values[labelValues] = self.values.get(labelValues, 0) + amount
+
+    def get(self, *labelValues):
+        return self.values.get(labelValues, 0)
+
+
+class Gauge(Metric):
+    TYPE = 'gauge'
+
+    def set(self, value, *labelValues):
+        self.values[labelValues] = value
+
+    def inc(self, *labelValues, amount=1):
+        self.values[labelValues] = self.values.get(labelValues, 0) + amount
+
+    def dec(self, *labelValues, amount=1):
+        self.inc(*labelValues, amount=-amount)
+
+    def get(self, *labelValues):
+        return self.values.get(labelValues, 0)
+
+
+class Histogram(Metric):
+    TYPE = 'histogram'
+
+    BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+    def __init__(self, name, description, labels=(), buckets=None):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(self.BUCKETS if buckets is None else buckets)
+
+    def observe(self, value, *labelValues):
+        counts = self.values.get(labelValues)
+        if counts is None:
+            # One count per bucket, then +Inf, then the sum
+            counts = self.values[labelValues] = [0] * (len(self.buckets) + 1) + [0.0]
+
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def count(self, *labelValues):
+        counts = self.values.get(labelValues)
+        return sum(counts[:-1]) if counts else 0
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} {self.TYPE}']
+        for labelValues, counts in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_labels(self.labels, labelValues, [("le", bound)])} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labels, labelValues)} {counts[-1]}')
+            lines.append(f'{self.name}_count{_labels(self.labels, labelValues)} {cumulative}')
+        return lines
+
+
+class Metrics:
+    '''Registry of the metrics an `OsuAPI` records about its calls
+
+    Hooks are called as `hook(phase, path)` when a phase starts and may return a context manager wrapping
+    the phase, for example `lambda phase, path: tracer.start_as_current_span(f'osu.{phase}')`.
+    Collectors are called on render and return extra `Metric`s, for example gauges read from a cache.'''
+
+    PHASES = ('limiter', 'network', 'decode', 'build')
+
+    def __init__(self, buckets=None):
+        self.calls = Counter('osu_api_calls_total', 'API calls by endpoint and outcome', ('path', 'outcome'))
+        self.phases = Histogram('osu_api_phase_seconds', 'Time spent in each phase of API calls',
+                                ('path', 'phase'), buckets)
+        self.inFlight = Gauge('osu_api_in_flight', 'API requests currently in flight', ('path',))
+
+        self.metrics = [self.calls, self.phases, self.inFlight]
+
+        self._hooks = []
+        self._collectors = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def addHook(self, hook):
+        self._hooks.append(hook)
+
+    def removeHook(self, hook):
+        self._hooks.remove(hook)
+
+    def addCollector(self, collector):
+        self._collectors.append(collector)
+
+    @contextmanager
+    def phase(self, path, phase):
+        '''Times the wrapped block as `phase` of a call to `path` and runs it inside the hooks'''
+        if not self._hooks:
+            start = monotonic()
+            try:
+                yield
+            finally:
+                self.phases.observe(monotonic() - start, path, phase)
+            return
+
+        with ExitStack() as stack:
+            for hook in self._hooks:
+                manager = hook(phase, path)
+                if manager is not None:
+                    stack.enter_context(manager)
+
+            start = monotonic()
+            try:
+                yield
+            finally:
+                self.phases.observe(monotonic() - start, path, phase)
+
+    def render(self):
+        '''Renders every metric in the Prometheus text exposition format'''
+        metrics = list(self.metrics)
+        for collector in self._collectors:
+            metrics.extend(collector())
+
+        return '\n'.join(line for metric in metrics for line in metric.render()) + '\n'
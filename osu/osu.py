@@ -2,9 +2,13 @@ import aiohttp
 from collections import namedtuple
 import asyncio
 
+from base64 import b64decode, b64encode
+
+import math
+
 from enum import Enum
 
-from functools import reduce
+from functools import lru_cache
 
 from datetime import datetime
 
@@ -14,7 +18,31 @@ from sys import stdout
 
 from time import monotonic, time
 
-import json
+import warnings
+
+import weakref
+
+# The fastest JSON decoder installed, every one of them accepts the response bytes
+try:
+    from orjson import loads as decodeJSON
+except ImportError:
+    try:
+        from ujson import loads as decodeJSON
+    except ImportError:
+        from json import loads as decodeJSON
+
+from .calllog import CallLog
+from .frames import BeatmapFrame, ScoreFrame
+from .keys import KeyPool
+from .metrics import Counter, Gauge, Metrics
+from .ratelimit import SlidingWindowLimiter
+from .replay import decodeReplay
+from .resilience import RetryPolicy
+
+
+__all__ = ['APIError', 'ResponseError', 'CircuitOpenError', 'ArgumentError', 'ModValues', 'Modes', 'LanguageNames',
+           'Genres', 'ApprovedStatus', 'Mods', 'Difficulty', 'BulkResult', 'Beatmapset', 'Beatmap', 'Event', 'User',
+           'Score', 'OsuAPI', 'requestKey']
 
 
 def _toBase62(i):
@@ -35,10 +63,28 @@ def _toBase62(i):
     return ''.join(map(lambda j: encoding[j], reversed(indices)))
 
 
+def requestKey(path, parameters):
+    '''Normalized identity of an API call, the API key `k` is never part of it'''
+    return path, tuple(sorted((str(k), str(v)) for k, v in parameters.items() if k != 'k'))
+
+
 class APIError(Exception):
     pass
 
 
+class ResponseError(APIError):
+    '''Raised when osu! answers with an error status, a body that is not JSON or an error message'''
+    def __init__(self, message, status, retryable=True):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+
+
+class CircuitOpenError(APIError):
+    '''Raised without calling osu! while the circuit breaker is open'''
+    pass
+
+
 class ArgumentError(APIError):
     def __init__(self, name, value, condition):
         super().__init__(f'{name} ! {value} : {condition}')
@@ -144,60 +190,186 @@ class ApprovedStatus(Enum):
     Graveyard = -2
 
 
+_SHORT_NAMES = {ModValues.NO_FAIL: 'NF',
+                ModValues.EASY: 'EZ',
+                ModValues.TOUCH_DEVICE: 'TD',
+                ModValues.HIDDEN: 'HD',
+                ModValues.HARD_ROCK: 'HR',
+                ModValues.SUDDEN_DEATH: 'SD',
+                ModValues.DOUBLE_TIME: 'DT',
+                ModValues.RELAX: 'RX',
+                ModValues.HALF_TIME: 'HT',
+                ModValues.NIGHTCORE: 'NC',
+                ModValues.FLASHLIGHT: 'FL',
+                ModValues.AUTOPLAY: 'AT',
+                ModValues.SPUN_OUT: 'SO',
+                ModValues.AUTOPILOT: 'AP',
+                ModValues.PERFECT: 'PF',
+                ModValues.KEY4: '4K',
+                ModValues.KEY5: '5K',
+                ModValues.KEY6: '6K',
+                ModValues.KEY7: '7K',
+                ModValues.KEY8: '8K',
+                ModValues.FADE_IN: 'FI',
+                ModValues.RANDOM: 'RD',
+                ModValues.CINEMA: 'CN',
+                ModValues.TARGET: 'TP',
+                ModValues.KEY9: '9K',
+                ModValues.KEY_COOP: 'CO',
+                ModValues.KEY1: '1K',
+                ModValues.KEY3: '3K',
+                ModValues.KEY2: '2K',
+                ModValues.SCORE_V2: 'V2',
+                ModValues.LAST_MOD: 'MR'}
+
+_BY_BIT = {mod.value: mod for mod in _SHORT_NAMES}
+
+# Nightcore and perfect are always sent together with the mod they extend
+_IMPLIED = {ModValues.NIGHTCORE.value: ModValues.DOUBLE_TIME.value,
+            ModValues.PERFECT.value: ModValues.SUDDEN_DEATH.value}
+
+_PARSE = {name: mod.value | _IMPLIED.get(mod.value, 0) for mod, name in _SHORT_NAMES.items()}
+_PARSE.update({'NM': 0, 'AU': ModValues.AUTOPLAY.value, 'SV2': ModValues.SCORE_V2.value})
+
+
+@lru_cache(maxsize=4096)
+def _decode(value):
+    '''Mods and short names of a bitmask, in bit order'''
+    if value == 0:
+        return (ModValues.NONE,), ()
+
+    mods = []
+    bits = value
+    while bits:
+        bit = bits & -bits
+        bits ^= bit
+        if bit in _BY_BIT:
+            mods.append(_BY_BIT[bit])
+
+    hidden = {implied for mod, implied in _IMPLIED.items() if value & mod}
+
+    return tuple(mods), tuple(_SHORT_NAMES[mod] for mod in mods if mod.value not in hidden)
+
+
 class Mods:
+    '''Set of mods kept as the bitmask the API uses'''
+    __slots__ = ('value',)
+
     def __init__(self, *modValues):
-        self.value = reduce(lambda a, b: Mods.getValue(a) | Mods.getValue(b), modValues, 0)
+        value = 0
+        for mod in modValues:
+            value |= Mods.getValue(mod)
+
+        self.value = value
 
     @staticmethod
     def fromValue(v):
-        m = Mods()
+        m = Mods.__new__(Mods)
         m.value = v
         return m
 
+    @staticmethod
+    def fromString(s):
+        '''Parses short names such as `"HDDTHR"`, `"+HD,DT"` or `"nm"`'''
+        names = s.upper()
+        for separator in '+, |':
+            names = names.replace(separator, '')
+
+        if names in ('', 'NONE'):
+            return Mods.fromValue(0)
+
+        value = 0
+        i = 0
+        while i < len(names):
+            for length in (3, 2):
+                name = names[i:i + length]
+                if len(name) == length and name in _PARSE:
+                    value |= _PARSE[name]
+                    i += length
+                    break
+            else:
+                raise ValueError(f'Unknown mod {names[i:i + 2]!r} in {s!r}')
+
+        return Mods.fromValue(value)
+
+    @staticmethod
+    def getValue(o):
+        if isinstance(o, (ModValues, Mods)):
+            return o.value
+        if isinstance(o, str):
+            return Mods.fromString(o).value
+        return o
+
+    @staticmethod
+    def mask(values, mods):
+        '''Whether each mod bitmask of `values` contains every mod of `mods`,
+        vectorized if `values` is a NumPy array'''
+        bits = Mods.getValue(mods)
+
+        if hasattr(values, '__array__'):
+            return (values & bits) == bits
+
+        return [(v & bits) == bits for v in values]
+
     def __add__(self, o):
-        if isinstance(o, Mods):
-            return Mods(*self, *o)
-        elif isinstance(o, ModValues):
+        if isinstance(o, (Mods, ModValues)):
             return Mods.fromValue(self.value | o.value)
         return NotImplemented
 
+    __or__ = __add__
+
+    def __and__(self, o):
+        if isinstance(o, (Mods, ModValues)):
+            return Mods.fromValue(self.value & o.value)
+        return NotImplemented
+
     def __sub__(self, o):
-        if isinstance(o, Mods):
-            return reduce(lambda m, v: m - v, o, Mods())
-        elif isinstance(o, ModValues):
-            if o not in self:
-                raise ValueError(f'{str(self)} does not contain {o.name}')
-            return Mods.fromValue(self.value ^ o.value)
+        if isinstance(o, (Mods, ModValues)):
+            if o.value & ~self.value:
+                raise ValueError(f'{str(self)} does not contain {o.name if isinstance(o, ModValues) else str(o)}')
+            return Mods.fromValue(self.value & ~o.value)
         return NotImplemented
 
     def __contains__(self, o):
-        if isinstance(o, ModValues):
-            return self.value & o.value > 0
+        if isinstance(o, (Mods, ModValues, str)):
+            bits = Mods.getValue(o)
+            if bits == 0:
+                return self.value == 0
+            return self.value & bits == bits
         return False
 
+    def __eq__(self, o):
+        if isinstance(o, Mods):
+            return self.value == o.value
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __int__(self):
+        return self.value
+
     def __str__(self):
         return f'({", ".join(map(lambda x: x.name, self.modList))})'
 
+    def __repr__(self):
+        return f'Mods({self.shortName})'
+
     @property
     def modList(self):
-        if self.value == 0:
-            return [ModValues.NONE]
+        return list(_decode(self.value)[0])
 
-        mods = []
-        for i in ModValues:
-            if self.value & i.value > 0:
-                mods.append(i)
+    @property
+    def names(self):
+        '''Canonical short names, nightcore and perfect hide the mod they extend'''
+        return _decode(self.value)[1]
 
-        return mods
+    @property
+    def shortName(self):
+        return ''.join(self.names) or 'NM'
 
     def __iter__(self):
-        return iter(self.modList)
-
-    @staticmethod
-    def getValue(o):
-        if isinstance(o, ModValues):
-            return o.value
-        return o
+        return iter(_decode(self.value)[0])
 
 
 class Difficulty(namedtuple('Difficulty', ['bpm', 'stars', 'cs', 'od', 'ar', 'hp', 'length', 'drain', 'maxcombo'])):
@@ -205,17 +377,94 @@ class Difficulty(namedtuple('Difficulty', ['bpm', 'stars', 'cs', 'od', 'ar', 'hp
     pass
 
 
+class BulkResult(namedtuple('BulkResult', ['key', 'value', 'error'])):
+    '''Outcome of one item of a bulk fetch, `error` is the exception raised for that item or `None`'''
+    pass
+
+
+class _Cached:
+    '''Property computed on first access and kept in the `_decoded` slot until the object is refreshed'''
+    __slots__ = ('func', 'name')
+
+    def __init__(self, func=None):
+        self.func = func
+        self.name = None if func is None else func.__name__
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def compute(self, obj):
+        return self.func(obj)
+
+    def __get__(self, obj, cls=None):
+        if obj is None:
+            return self
+
+        decoded = obj._decoded
+        if decoded is None:
+            decoded = obj._decoded = {}
+
+        try:
+            return decoded[self.name]
+        except KeyError:
+            value = decoded[self.name] = self.compute(obj)
+            return value
+
+
+class _Field(_Cached):
+    '''Decodes the raw response value kept in `slot` on first access'''
+    __slots__ = ('slot', 'decode', '_member')
+
+    def __init__(self, slot, decode=None):
+        super().__init__()
+
+        self.slot = slot
+        self.decode = decode
+        self._member = None
+
+    def __set_name__(self, owner, name):
+        super().__set_name__(owner, name)
+
+        self._member = owner.__dict__[self.slot]
+
+    def compute(self, obj):
+        value = self._member.__get__(obj, type(obj))
+
+        if value is None or self.decode is None:
+            return value
+
+        return self.decode(value)
+
+    def __get__(self, obj, cls=None):
+        if obj is not None and self.decode is None:
+            return self._member.__get__(obj, cls)
+
+        return super().__get__(obj, cls)
+
+
+def _flag(value):
+    return value == '1'
+
+
+def _float(value):
+    return float(value) if value != '' else None
+
+
 class Beatmapset:
+    __slots__ = ('osuAPI', 'beatmapsetID', '_beatmaps', '__weakref__')
+
     def __init__(self, osuAPI,
                  beatmapsetID):
         self.osuAPI = osuAPI
 
         self.beatmapsetID = beatmapsetID
 
-        self.beatmapSetURL = f'https://osu.ppy.sh/s/{self.beatmapsetID}'
-
         self._beatmaps = None
 
+    @property
+    def beatmapSetURL(self):
+        return f'https://osu.ppy.sh/s/{self.beatmapsetID}'
+
     @property
     def beatmaps(self):
         '''Returns the list of beatmaps in non-async method. **Can return `None`**'''
@@ -223,13 +472,15 @@ class Beatmapset:
 
     async def getBeatmaps(self):
         if self._beatmaps is None:
-            self._beatmaps = await self.osuAPI.getBeatmaps(beatmapset_id=self.beatmapsetID)
+            self._beatmaps = await self.osuAPI.getBeatmaps(beatmapset=self.beatmapsetID)
 
         return self._beatmaps
 
 
 class Beatmap:
-    '''Represents a beatmap, *not a beatmap set*. Meant to be subclassed'''
+    '''Represents a beatmap, *not a beatmap set*. Meant to be subclassed
+
+    Fields are kept as returned by the API and decoded when accessed. Fields the class does not know are ignored'''
     # APPROVED_STATUS = {'4': 'Loved',
     #                    '3': 'Qualified',
     #                    '2': 'Approved',
@@ -248,6 +499,12 @@ class Beatmap:
     #
     # MODES = ['Standard', 'Taiko', 'CtB', 'Mania']
 
+    __slots__ = ('api', 'beatmapSet', '_approved', 'approved_date', 'last_update', 'artist', '_beatmapID',
+                 '_beatmapsetID', '_bpm', 'creatorName', '_creatorID', 'source', '_stars', '_cs', '_od', '_ar',
+                 '_hp', '_drain', '_genreID', '_languageID', 'title', '_length', 'versionName', '_md5', '_mode',
+                 '_tags', '_favorites', '_playcount', '_passcount', '_maxCombo', '_creator', '_decoded',
+                 '__weakref__')
+
     def __init__(self, osuAPI,
                  approved,
                  approved_date,
@@ -276,32 +533,40 @@ class Beatmap:
                  favourite_count,
                  playcount,
                  passcount,
-                 max_combo):
+                 max_combo,
+                 **extra):
         self.api = osuAPI
 
-        self.beatmapSet = self.api.beatmapsetCls(self.api, beatmapset_id)
+        # Decoded fields of the previous row are dropped when an interned object is refreshed
+        self._decoded = None
+
+        self.beatmapSet = self.api.beatmapset(beatmapset_id)
 
-        self.approved = ApprovedStatus(approved)
+        self._approved = approved
         self.approved_date = approved_date
         self.last_update = last_update
         self.artist = artist
-        self.beatmapID = beatmap_id
-        self.beatmapsetID = beatmapset_id
-
-        self.difficulty = self.api.difficultyCls(bpm, difficultyrating, diff_size, diff_overall,
-                                                 diff_approach, diff_drain, total_length, hit_length, max_combo)
-
-        self.creator = creator
-        self.creatorID = creator_id
+        self._beatmapID = beatmap_id
+        self._beatmapsetID = beatmapset_id
+
+        self._bpm = bpm
+        self._stars = difficultyrating
+        self._cs = diff_size
+        self._od = diff_overall
+        self._ar = diff_approach
+        self._hp = diff_drain
+        self._length = total_length
+        self._drain = hit_length
+        self._maxCombo = max_combo
+
+        self.creatorName = creator
+        self._creatorID = creator_id
         self.source = source
 
         self._creator = None
 
-        self.genre_id = int(genre_id)
-        self.genre = Genres(self.genre_id)
-
-        self.language_id = int(language_id)
-        self.language = LanguageNames(self.language_id)
+        self._genreID = genre_id
+        self._languageID = language_id
 
         self.title = title
 
@@ -309,19 +574,51 @@ class Beatmap:
 
         self._md5 = file_md5
 
-        self.mode_id = int(mode)
-        self.mode = Modes(int(mode))
+        self._mode = mode
+
+        self._tags = tags
 
-        self.tags = list(tags.split(' '))
+        self._favorites = favourite_count
 
-        self.favorites = int(favourite_count)
+        self._playcount = playcount
+        self._passcount = passcount
 
-        self.playcount = int(playcount)
-        self.passcount = int(passcount)
+    approved = _Field('_approved', lambda v: ApprovedStatus(int(v)))
+    beatmapID = _Field('_beatmapID', int)
+    beatmapsetID = _Field('_beatmapsetID', int)
+    creatorID = _Field('_creatorID', int)
+    genre_id = _Field('_genreID', int)
+    genre = _Field('_genreID', lambda v: Genres(int(v)))
+    language_id = _Field('_languageID', int)
+    language = _Field('_languageID', lambda v: LanguageNames(int(v)))
+    mode_id = _Field('_mode', int)
+    mode = _Field('_mode', lambda v: Modes(int(v)))
+    md5 = _Field('_md5')
+    tags = _Field('_tags', lambda v: v.split(' '))
+    favorites = _Field('_favorites', int)
+    playcount = _Field('_playcount', int)
+    passcount = _Field('_passcount', int)
 
-        self.osuDirectLink = f'osu://dl/{self.beatmapsetID}'
-        self.beatmapURL = f'https://osu.ppy.sh/b/{self.beatmapID}'
-        self.beatmapSetURL = self.beatmapSet.beatmapSetURL
+    @_Cached
+    def difficulty(self):
+        maxCombo = self._maxCombo
+        if maxCombo is not None:
+            maxCombo = int(maxCombo)
+
+        return self.api.difficultyCls(float(self._bpm), float(self._stars), float(self._cs), float(self._od),
+                                      float(self._ar), float(self._hp), int(self._length), int(self._drain), maxCombo)
+
+    @property
+    def osuDirectLink(self):
+        return f'osu://dl/{self._beatmapsetID}'
+
+    @property
+    def beatmapURL(self):
+        return f'https://osu.ppy.sh/b/{self._beatmapID}'
+
+    @property
+    def beatmapSetURL(self):
+        return self.beatmapSet.beatmapSetURL
 
     @property
     def creator(self):
@@ -330,46 +627,66 @@ class Beatmap:
 
     async def getCreator(self):
         if self._creator is None:
-            self._creator = self.api.getUser(self.creatorID, IDMode='id')
+            self._creator = self.api.lookupUser(self._creatorID)
+
+        if self._creator is None:
+            self._creator = await self.api.getUser(self._creatorID, IDMode='id')
 
         return self._creator
 
     def __repr__(self):
-        return f'{self.title} ({self.beatmap_id}/{self.beatmapset_id})'
+        return f'{self.title} ({self._beatmapID}/{self._beatmapsetID})'
 
 
 class Event:
     '''Represents an "event". Meant to be subclassed'''
 
+    __slots__ = ('osuAPI', 'displayHTML', '_beatmapID', '_beatmapsetID', 'beatmapSet', 'date', '_epicFactor', '_beatmap',
+                 '_decoded', '__weakref__')
+
     def __init__(self, osuAPI,
                  display_html,
                  beatmap_id,
                  beatmapset_id,
                  date,
-                 epicfactor):
+                 epicfactor,
+                 **extra):
         self.osuAPI = osuAPI
 
+        self._decoded = None
+
         self.displayHTML = display_html
 
-        self.beatmapID = beatmap_id
-        self.beatmapsetID = beatmapset_id
+        self._beatmapID = beatmap_id
+        self._beatmapsetID = beatmapset_id
 
-        self.beatmapSet = self.api.beatmapsetCls(self.api, beatmapset_id)
+        # Held so the interned set lives as long as the event
+        self.beatmapSet = None if beatmapset_id is None else osuAPI.beatmapset(beatmapset_id)
 
         self.date = date
 
-        self.epicFactor = int(epicfactor)
+        self._epicFactor = epicfactor
 
         self._beatmap = None
 
+    beatmapID = _Field('_beatmapID', int)
+    beatmapsetID = _Field('_beatmapsetID', int)
+    epicFactor = _Field('_epicFactor', int)
+
     @property
     def beatmap(self):
         '''Returns the beatmap related to the event in non-async method. **Can return `None`**'''
         return self._beatmap
 
     async def getBeatmap(self):
+        if self._beatmapID is None:
+            return None
+
+        if self._beatmap is None:
+            self._beatmap = self.osuAPI.lookupBeatmap(self._beatmapID)
+
         if self._beatmap is None:
-            self._beatmap = (await self.osuAPI.getBeatmaps(beatmap_id=self.beatmapID))[0]
+            self._beatmap = (await self.osuAPI.getBeatmaps(beatmap=self._beatmapID))[0]
 
         return self._beatmap
 
@@ -377,6 +694,10 @@ class Event:
 class User:
     '''Represents a user. Meant to be subclassed'''
 
+    __slots__ = ('osuAPI', '_ID', 'username', '_count300', '_count100', '_count50', '_playcount', '_rankedScore',
+                 '_totalScore', '_rank', '_level', '_pp', '_accuracy', '_countSS', '_countSSH', '_countS', '_countSH',
+                 '_countA', 'country', '_countryRank', '_events', '_decoded', '__weakref__')
+
     def __init__(self, osuAPI,
                  user_id,
                  username,
@@ -397,46 +718,90 @@ class User:
                  count_rank_a,
                  country,
                  pp_country_rank,
-                 events):
+                 events,
+                 **extra):
         self.osuAPI = osuAPI
 
-        self.ID = int(user_id)
+        self._decoded = None
+
+        self._ID = user_id
         self.username = username
 
-        self.hitCounts = {'50': int(count50),
-                          '100': int(count100),
-                          '300': int(count300)}
+        self._count300 = count300
+        self._count100 = count100
+        self._count50 = count50
 
-        self.playcount = playcount
+        self._playcount = playcount
 
-        self.rankedScore = ranked_score
-        self.totalScore = total_score
+        self._rankedScore = ranked_score
+        self._totalScore = total_score
 
-        self.level = float(level)
+        self._level = level
 
-        self.rank = int(pp_rank)
-        self.pp = float(pp_raw)
+        self._rank = pp_rank
+        self._pp = pp_raw
 
-        self.accuracy = float(accuracy) / 100
-        self.rankCounts = {'ss': int(count_rank_ss),
-                           'ssh': int(count_rank_ssh),
-                           's': int(count_rank_s),
-                           'sh': int(count_rank_sh),
-                           'a': int(count_rank_a)}
+        self._accuracy = accuracy
+        self._countSS = count_rank_ss
+        self._countSSH = count_rank_ssh
+        self._countS = count_rank_s
+        self._countSH = count_rank_sh
+        self._countA = count_rank_a
 
         self.country = country
-        self.countryRank = int(pp_country_rank)
+        self._countryRank = pp_country_rank
+
+        # Raw rows until the events are first accessed
+        self._events = events
+
+    ID = _Field('_ID', int)
+    playcount = _Field('_playcount', int)
+    rankedScore = _Field('_rankedScore', int)
+    totalScore = _Field('_totalScore', int)
+    level = _Field('_level', float)
+    rank = _Field('_rank', int)
+    pp = _Field('_pp', float)
+    accuracy = _Field('_accuracy', lambda v: float(v) / 100)
+    countryRank = _Field('_countryRank', int)
+
+    @_Cached
+    def hitCounts(self):
+        return {'50': int(self._count50 or 0),
+                '100': int(self._count100 or 0),
+                '300': int(self._count300 or 0)}
+
+    @_Cached
+    def rankCounts(self):
+        return {'ss': int(self._countSS or 0),
+                'ssh': int(self._countSSH or 0),
+                's': int(self._countS or 0),
+                'sh': int(self._countSH or 0),
+                'a': int(self._countA or 0)}
 
-        self.events = [self.osuAPI.eventCls(self.osuAPI, **e) for e in events]
+    @property
+    def events(self):
+        if self._events and isinstance(self._events[0], dict):
+            self._events = [self.osuAPI.eventCls(self.osuAPI, **e) for e in self._events]
 
-        self.spectateURL = f'osu://spectate/{self.ID}'
-        self.profileURL = f'https://osu.ppy.sh/u/{self.id}'
+        return self._events
+
+    @property
+    def spectateURL(self):
+        return f'osu://spectate/{self._ID}'
+
+    @property
+    def profileURL(self):
+        return f'https://osu.ppy.sh/u/{self._ID}'
 
     def __repr__(self):
-        return f'{self.username} ({self.ID})'
+        return f'{self.username} ({self._ID})'
 
 
 class Score:
+    __slots__ = ('osuAPI', '_score', '_count300', '_count100', '_count50', '_countMiss', '_maxCombo', '_countKatu',
+                 '_countGeki', '_perfect', '_mods', '_userID', '_date', 'rank', '_pp', '_hasReplay', 'userName',
+                 '_scoreID', '_beatmapID', '_user', '_beatmap', '_decoded', '__weakref__')
+
     def __init__(self, osuAPI,
                  score,
                  count300,
@@ -455,65 +820,98 @@ class Score:
                  replay_available=None,
                  username=None,
                  score_id=None,
-                 beatmap_id=None):
+                 beatmap_id=None,
+                 **extra):
         self.osuAPI = osuAPI
 
-        self.IDs = {'score': score_id, 'beatmap': beatmap_id}
+        self._decoded = None
 
-        nones = sum(map(lambda a: a is None, self.scores.values()))
-
-        if nones == 0:
-            self.idType = 'none'
-        elif nones == 1:
-            if self.scores['score'] is not None:
-                self.idType = 'score'
-            else:
-                self.idType = 'beatmap'
-        elif nones == 2:
-            self.idType = 'both'
+        self._scoreID = score_id
+        self._beatmapID = beatmap_id
 
-        if score_id is not None:
-            self.ID = score_id
-            self.IDType = 'score'
-        if beatmap_id is not None:
-            self.ID = beatmap_id
-            self.IDType = 'beatmap'
-
-        self.score = int(score)
+        self._score = score
 
         self.userName = username
-        self.userID = user_id
+        self._userID = user_id
 
-        self.hitCounts = {'miss': int(countmiss),
-                          '50': int(count50),
-                          '100': int(count100),
-                          '300': int(count300),
-                          'katu': int(countkatu),
-                          'geki': int(countgeki)}
+        self._count300 = count300
+        self._count100 = count100
+        self._count50 = count50
+        self._countMiss = countmiss
+        self._countKatu = countkatu
+        self._countGeki = countgeki
 
-        self.maxCombo = maxcombo
+        self._maxCombo = maxcombo
 
-        self.perfect = perfect == '1'
+        self._perfect = perfect
 
-        self.mods = Mods.fromValue(int(enabled_mods))
+        self._mods = enabled_mods
 
-        self.date = datetime.strptime(date, '%Y-%m-%d %H:%M:%S')
+        self._date = date
 
         self.rank = rank
 
-        self.pp = pp
-        if type(pp) == str:
-            self.pp = float(pp)
+        self._pp = pp
 
-        self.hasReplay = replay_available == '1'
+        self._hasReplay = replay_available
 
         self._user = None
 
         self._beatmap = None
 
+    score = _Field('_score', int)
+    userID = _Field('_userID', int)
+    maxCombo = _Field('_maxCombo', int)
+    perfect = _Field('_perfect', _flag)
+    mods = _Field('_mods', lambda v: Mods.fromValue(int(v)))
+    date = _Field('_date', datetime.fromisoformat)
+    pp = _Field('_pp', _float)
+    hasReplay = _Field('_hasReplay', _flag)
+    scoreID = _Field('_scoreID', int)
+    beatmapID = _Field('_beatmapID', int)
+
+    @_Cached
+    def hitCounts(self):
+        return {'miss': int(self._countMiss),
+                '50': int(self._count50),
+                '100': int(self._count100),
+                '300': int(self._count300),
+                'katu': int(self._countKatu),
+                'geki': int(self._countGeki)}
+
+    @property
+    def IDs(self):
+        return {'score': self.scoreID, 'beatmap': self.beatmapID}
+
+    @property
+    def idType(self):
+        '''Which ids the score came with, `'both'`, `'score'`, `'beatmap'` or `'none'`'''
+        if self._scoreID is not None and self._beatmapID is not None:
+            return 'both'
+        if self._scoreID is not None:
+            return 'score'
+        if self._beatmapID is not None:
+            return 'beatmap'
+        return 'none'
+
+    @property
+    def ID(self):
+        if self._beatmapID is not None:
+            return self.beatmapID
+        return self.scoreID
+
+    @property
+    def IDType(self):
+        if self._beatmapID is not None:
+            return 'beatmap'
+        if self._scoreID is not None:
+            return 'score'
+        return None
+
     async def getReplay(self):
-        if self.hasReplay:
-            return await self.osuAPI.getReplay(self.beatmapID, self.userID)
+        if self.hasReplay and self._beatmapID is not None:
+            scoreKey = self._scoreID if self._scoreID is not None else f'{self._date}/{self._score}'
+            return await self.osuAPI.getReplay(self._beatmapID, self._userID, scoreKey=scoreKey)
 
     @property
     def user(self):
@@ -522,7 +920,10 @@ class Score:
 
     async def getUser(self):
         if self._user is None:
-            self._user = await self.osuAPI.getUser(self.userID, IDMode='id')
+            self._user = self.osuAPI.lookupUser(self._userID)
+
+        if self._user is None:
+            self._user = await self.osuAPI.getUser(self._userID, IDMode='id')
 
         return self._user
 
@@ -532,30 +933,53 @@ class Score:
         return self._beatmap
 
     async def getBeatmap(self):
-        if self.IDs['beatmap'] is None:
+        if self._beatmapID is None:
             return None
 
         if self._beatmap is None:
-            self._beatmap = (await self.osuAPI.getBeatmaps(self.IDs['beatmap']))[0]
+            self._beatmap = self.osuAPI.lookupBeatmap(self._beatmapID)
+
+        if self._beatmap is None:
+            self._beatmap = (await self.osuAPI.getBeatmaps(beatmap=self._beatmapID))[0]
 
         return self._beatmap
 
     def __repr__(self):
-        return f'Score({self.score}, {self.idType})'
+        return f'Score({self._score}, {self.idType})'
 
 
 class OsuAPI:
-    '''API client to interact with the osu! API. Not meant to be subclassed'''
+    '''API client to interact with the osu! API. Not meant to be subclassed
+
+    `decoder` turns response bodies into rows, `decodeJSON` by default which is orjson or ujson when installed.
+    The `getX` methods take `raw=True` to return the rows as decoded, without building any model. Rows may be
+    shared with the cache and must not be modified.
+
+    Pass `session=None` to let the client own a session tuned for the API: a connector with
+    `connectionLimit` keep-alive connections and a DNS cache, `warmConnections` connections opened
+    by `start()` and, with `keepAlive`, a cheap keyless request every `keepAlive` idle seconds so
+    connections are not dropped between calls. Use it as `async with OsuAPI(None, key) as api:`.'''
+
+    API_URL = 'https://osu.ppy.sh/api/'
+
+    # relation -> (slot caching the related object, slot of its id)
+    RELATIONS = {'beatmap': ('_beatmap', '_beatmapID'),
+                 'user': ('_user', '_userID'),
+                 'creator': ('_creator', '_creatorID')}
 
     def __init__(self, session, key, *, rate=60, logOutput=None, loggingLevel=logging.INFO,
                  beatmapCls=Beatmap, userCls=User, difficultyCls=Difficulty, eventCls=Event,
-                 scoreCls=Score, beatmapsetCls=Beatmapset,
-                 loop=None, limitedTaskDelay=1, callLog=None):
+                 scoreCls=Score, beatmapsetCls=Beatmapset, scoreFrameCls=ScoreFrame, beatmapFrameCls=BeatmapFrame,
+                 loop=None, limitedTaskDelay=None, callLog=None, limiter=None, replayLimiter=None, cache=None,
+                 store=None, metrics=None, scheduler=None, retry=None, breaker=None, timeout=None, hedge=None,
+                 connectionLimit=None, warmConnections=1, keepAlive=None, decoder=decodeJSON, replayCache=None):
         if loop is None:
             loop = asyncio.get_event_loop()
         self.loop = loop
 
-        self.limitedTaskDelay = limitedTaskDelay
+        if limitedTaskDelay is not None:
+            warnings.warn('limitedTaskDelay is ignored, rate limiting no longer runs background tasks',
+                          DeprecationWarning, stacklevel=2)
 
         self.logger = logging.getLogger('osu!api')
         self.logger.setLevel(logging.DEBUG)
@@ -581,9 +1005,9 @@ class OsuAPI:
             rate = 1
 
         self.rate = rate
-        self._nextRateFree = 60
 
         self.session = session
+        self.ownsSession = session is None
         self.key = key
 
         self.beatmapCls = beatmapCls
@@ -592,114 +1016,429 @@ class OsuAPI:
         self.eventCls = eventCls
         self.scoreCls = scoreCls
         self.beatmapsetCls = beatmapsetCls
+        self.scoreFrameCls = scoreFrameCls
+        self.beatmapFrameCls = beatmapFrameCls
+
+        # A key pool limits every call by the budget of the key it goes to
+        self.keyPool = key if isinstance(key, KeyPool) else None
+
+        if limiter is None:
+            limiter = SlidingWindowLimiter(rate, 60) if self.keyPool is None else self.keyPool
+        if replayLimiter is None:
+            replayLimiter = SlidingWindowLimiter(10, 10)
+
+        self.limiter = limiter
+        self.replayLimiter = replayLimiter
+
+        if scheduler is not None and scheduler.limiter is None:
+            scheduler.limiter = limiter
+
+        self.scheduler = scheduler
+
+        self.cache = cache
+        self.store = store
+        self.replayCache = replayCache
+
+        self.decoder = decoder
 
-        self.rateSemaphore = asyncio.Semaphore(value=rate, loop=self.loop)
-        self.replaySemaphore = asyncio.Semaphore(value=10, loop=self.loop)
+        if retry is None:
+            retry = RetryPolicy(retries=0)
 
-        self.pastCalls = set()
-        self.replayCalls = set()
+        self.retry = retry
+        self.breaker = breaker
+        self.timeout = timeout
+        # path -> seconds after which a duplicate request is sent if the first has not answered
+        self.hedge = {} if hedge is None else dict(hedge)
+
+        if connectionLimit is None:
+            # About one connection per call a second with room for slow responses
+            connectionLimit = max(4, math.ceil(2 * limiter.rate / limiter.period))
+
+        self.connectionLimit = connectionLimit
+        self.warmConnections = warmConnections
+        self.keepAlive = keepAlive
+
+        self._keepAliveTask = None
+        self._lastSent = monotonic()
+
+        self._inFlight = {}
+
+        if metrics is None:
+            metrics = Metrics()
+        self.metrics = metrics
+        self.metrics.addCollector(self._collectMetrics)
+
+        # Identity maps so every id resolves to a single live object
+        self._liveBeatmapsets = weakref.WeakValueDictionary()
+        self._liveBeatmaps = weakref.WeakValueDictionary()
+        self._liveUsers = weakref.WeakValueDictionary()
 
         self.logger.debug(f'Created API instance with key: {key} rpm: {rate}')
 
-        self._callID = -1
+        if isinstance(callLog, str):
+            callLog = CallLog(callLog)
 
         self.callLog = callLog
 
-        if self.callLog is not None:
-            try:
-                with open(self.callLog, 'r') as log:
-                    line = None
-                    for line in log.readlines():
-                        pass
-                    if line is not None:
-                        self._callID = int(line.split('|')[0], 16)
-            except FileNotFoundError:
-                with open(self.callLog, 'w') as log:
-                    log.write('callID|epochTime|path|parameters|responseStatus|timeElapsed\n')
+        self._callID = -1 if callLog is None else callLog.lastCallID
 
     @property
     def callID(self):
         self._callID += 1
         return self._callID
 
-    def removeCall(self, task):
-        self.pastCalls.remove(task)
-
     @property
     def timeUntilFree(self):
-        if not self.rateSemaphore.locked():
-            return 0
+        return self.limiter.timeUntilFree
 
-        return self._nextRateFree
+    def beatmapset(self, beatmapsetID):
+        '''Returns the live `Beatmapset` of `beatmapsetID`, creating it if there is none'''
+        beatmapsetID = int(beatmapsetID)
 
-    def removeReplayCall(self, task):
-        self.replayCalls.remove(task)
+        beatmapset = self._liveBeatmapsets.get(beatmapsetID)
+        if beatmapset is None:
+            beatmapset = self.beatmapsetCls(self, beatmapsetID)
+            self._liveBeatmapsets[beatmapsetID] = beatmapset
 
-    async def reserveReplay(self):
-        await asyncio.sleep(10)
-        self.replaySemaphore.release()
+        return beatmapset
 
-    async def reserveCall(self):
-        t = monotonic()
-        left = monotonic() - t
-        while left >= 0:
-            await asyncio.sleep(min(left, self.limitedTaskDelay))
-            left = 60 - monotonic() + t
-            self._nextRateFree = min(left, self._nextRateFree)
-        self.rateSemaphore.release()
+    def lookupBeatmap(self, beatmapID, mode=None):
+        '''Returns the live `Beatmap` of `beatmapID`, converted to `mode` if given, or `None`'''
+        return self._liveBeatmaps.get((int(beatmapID), mode))
+
+    def lookupUser(self, userID, mode=0):
+        '''Returns the live `User` of `userID` in `mode` or `None`'''
+        return self._liveUsers.get((int(userID), mode))
+
+    def _intern(self, live, key, cls, datum):
+        '''Returns the live object of `key` refreshed with `datum`, creating it if there is none'''
+        obj = live.get(key)
+
+        if obj is None:
+            obj = cls(self, **datum)
+            live[key] = obj
+        else:
+            obj.__init__(self, **datum)
+
+        return obj
 
     async def _APICall(self, path, parameters):
-        callID = hex(self.callID)[2:]
-        if self.callLog is not None:
-            with open(self.callLog, 'a') as log:
-                escaped = '\\|'
-                log.write(f'{callID}|{time()}|{path}|{json.dumps(parameters).replace("|", escaped)}')
+        if self.cache is not None:
+            cached = self.cache.get(path, parameters)
+            if cached is not None:
+                self.logger.debug(f'API Call: {path} {parameters} served from cache')
+                self.metrics.calls.inc(path, 'cached')
+                return cached
+
+        key = requestKey(path, parameters)
 
-        wroteAll = False
+        task = self._inFlight.get(key)
+
+        if task is None:
+            task = self.loop.create_task(self._fetch(path, parameters))
+            task.add_done_callback(lambda t: self._fetchDone(key, t))
+            self._inFlight[key] = task
+        else:
+            self.logger.debug(f'API Call: {path} {parameters} joined an identical call in flight')
+            self.metrics.calls.inc(path, 'coalesced')
+
+        # Shielded so a cancelled caller does not cancel the call for everyone else
+        return await asyncio.shield(task)
+
+    def _fetchDone(self, key, task):
+        if self._inFlight.get(key) is task:
+            del self._inFlight[key]
+
+        if not task.cancelled():
+            task.exception()
+
+    async def _fetch(self, path, parameters):
+        attempt = 0
+
+        while True:
+            if self.breaker is not None and not self.breaker.allow():
+                raise CircuitOpenError(f'error: {path}: osu! is failing, '
+                                       f'retrying in {self.breaker.retryAfter:.1f} seconds')
+
+            try:
+                if path in self.hedge:
+                    j = await self._hedged(path, parameters, self.hedge[path])
+                else:
+                    j = await self._request(path, parameters)
+            except asyncio.CancelledError:
+                if self.breaker is not None:
+                    self.breaker.record(None)
+                raise
+            except Exception as e:
+                if self.breaker is not None:
+                    self.breaker.record(self._breakerVerdict(e))
+
+                if not self.retry.shouldRetry(attempt, e):
+                    raise
+
+                delay = self.retry.delay(attempt)
+                attempt += 1
+
+                self.logger.warning(f'API Call: {path} failed with {e!r}, retry {attempt} in {delay:.2f} seconds')
+                await asyncio.sleep(delay)
+            else:
+                if self.breaker is not None:
+                    self.breaker.record(True)
+
+                if self.cache is not None:
+                    self.cache.put(path, parameters, j)
+
+                return j
+
+    def _breakerVerdict(self, error):
+        '''Whether `error` shows osu! is up, `None` if it says nothing about osu! such as a missed deadline'''
+        if isinstance(error, ResponseError):
+            # Errors that are not worth retrying still mean osu! answered
+            return not error.retryable
+
+        if isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError)):
+            return False
+
+        return None
+
+    async def _hedged(self, path, parameters, delay):
+        '''Sends a duplicate request if the first has not answered `delay` seconds after it was sent, the first
+        answer wins. The duplicate is only sent if a slot is free without queueing ahead of other calls'''
+        onSent = asyncio.Event()
+        tasks = [self.loop.create_task(self._request(path, parameters, onSent=onSent))]
+        sentWaiter = self.loop.create_task(onSent.wait())
 
         try:
-            if self.rateSemaphore.locked():
-                self.logger.warning(f'API Call({callID}): reached rate limit, {self.timeUntilFree:.2f} seconds left')
+            # Time spent waiting for the limiter does not count towards the delay
+            await asyncio.wait([tasks[0], sentWaiter], return_when=asyncio.FIRST_COMPLETED)
 
-            await self.rateSemaphore.acquire()
+            if not tasks[0].done():
+                done, _ = await asyncio.wait(tasks, timeout=delay)
 
-            timeTaken = monotonic()
-            self.logger.debug(f'API Call({callID}): {path} {parameters}')
+                if not done and self._acquireNow():
+                    self.logger.debug(f'API Call: {path} {parameters} is slow, sending a hedged request')
+                    tasks.append(self.loop.create_task(self._request(path, parameters, acquired=True)))
 
-            task = self.loop.create_task(self.reserveCall())
+            pending = set(tasks)
+            error = None
 
-            self.pastCalls.add(task)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
 
-            task.add_done_callback(self.removeCall)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
 
-            url = 'https://osu.ppy.sh/api/' + path
+            raise error
+        finally:
+            sentWaiter.cancel()
 
-            parameters.update({'k': self.key})
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()
 
-            async with self.session.get(url, params=parameters) as resp:
-                self.logger.debug(f'API Call({callID}): {path} completed with status code {resp.status}')
-                j = await resp.json()
+    async def _get(self, url, parameters):
+        if self.session is None:
+            self._openSession()
 
-                timeTaken = monotonic() - timeTaken
+        self._lastSent = monotonic()
 
-                with open(self.callLog, 'a') as log:
-                    log.write(f'|{resp.status}|{timeTaken}')
+        async with self.session.get(url, params=parameters) as resp:
+            return resp.status, await resp.read()
 
-                wroteAll = True
+    def _acquireNow(self):
+        '''Takes a slot only if one is free and no other call is waiting for it'''
+        if self.scheduler is not None:
+            return self.scheduler.acquireNow()
 
-                if 'error' in j:
-                    raise APIError(f'error: {path}: {j["error"]}')
+        return not self.limiter.waiting and self.limiter.tryAcquire() <= 0
 
-                return j
+    async def _request(self, path, parameters, onSent=None, acquired=False):
+        '''Makes a single HTTP request, taking one slot from the rate limiter unless the caller `acquired` it.
+        `onSent` is set once the slot is taken and the request goes out'''
+        callNumber = self.callID
+        callID = hex(callNumber)[2:]
+
+        started = time()
+        status = None
+        timeTaken = None
+        outcome = 'failed'
+        key = None
+        sent = None
+
+        self.metrics.inFlight.inc(path)
+
+        try:
+            if not acquired:
+                if self.limiter.locked:
+                    self.logger.warning(f'API Call({callID}): reached rate limit, {self.timeUntilFree:.2f} seconds left')
+
+                with self.metrics.phase(path, 'limiter'):
+                    if self.scheduler is not None:
+                        await self.scheduler.acquire()
+                    else:
+                        await self.limiter.acquire()
+
+            sent = monotonic()
+            if onSent is not None:
+                onSent.set()
+            self.logger.debug(f'API Call({callID}): {path} {parameters}')
+
+            url = self.API_URL + path
+
+            key = self.key if self.keyPool is None else self.keyPool.checkout()
+
+            with self.metrics.phase(path, 'network'):
+                status, body = await asyncio.wait_for(self._get(url, dict(parameters, k=key)), self.timeout)
+
+            timeTaken = monotonic() - sent
+            self.logger.debug(f'API Call({callID}): {path} completed with status code {status}')
+
+            if status == 429 or status >= 500:
+                raise ResponseError(f'error: {path}: status {status}', status)
+
+            with self.metrics.phase(path, 'decode'):
+                try:
+                    j = self.decoder(body)
+                except ValueError:
+                    raise ResponseError(f'error: {path}: status {status} response is not JSON', status,
+                                        retryable=status < 400) from None
+
+            if 'error' in j:
+                outcome = 'error'
+                raise ResponseError(f'error: {path}: {j["error"]}', status, retryable=False)
+
+            outcome = 'ok'
+            return j
+        except asyncio.CancelledError:
+            outcome = 'cancelled'
+            raise
         finally:
-            with open(self.callLog, 'a') as log:
-                if wroteAll:
-                    log.write('\n')
-                else:
-                    log.write('||\n')
+            if sent is not None and outcome != 'cancelled':
+                self.limiter.feedback(status, timeTaken)
+
+                if self.keyPool is not None:
+                    self.keyPool.report(key, outcome == 'ok', status, timeTaken)
+
+            self.metrics.inFlight.dec(path)
+            self.metrics.calls.inc(path, outcome)
+
+            if self.callLog is not None:
+                self.callLog.record(callNumber, started, path, parameters, status, timeTaken)
+
+    def _collectMetrics(self):
+        free = Gauge('osu_api_limiter_seconds_until_free', 'Seconds until the rate limiter has a free slot')
+        free.set(self.limiter.timeUntilFree)
+
+        rate = Gauge('osu_api_effective_rate', 'Calls per limiter period currently allowed')
+        rate.set(self.limiter.effectiveRate)
+
+        metrics = [free, rate]
+
+        if self.cache is not None:
+            lookups = Counter('osu_api_cache_lookups_total', 'Response cache lookups by result', ('result',))
+            lookups.inc('hit', amount=self.cache.hits)
+            lookups.inc('miss', amount=self.cache.misses)
+
+            ratio = Gauge('osu_api_cache_hit_ratio', 'Share of response cache lookups that were hits')
+            ratio.set(self.cache.hitRate)
+
+            size = Gauge('osu_api_cache_bytes', 'Estimated size of the response cache')
+            size.set(self.cache.currentBytes)
+
+            metrics += [lookups, ratio, size]
+
+        connector = getattr(self.session, 'connector', None)
+        if isinstance(connector, aiohttp.TCPConnector):
+            connections = Gauge('osu_api_connections', 'Connections of the session by state', ('state',))
+            # aiohttp does not expose pool stats publicly
+            connections.set(len(getattr(connector, '_acquired', ())), 'active')
+            connections.set(sum(len(c) for c in getattr(connector, '_conns', {}).values()), 'idle')
+
+            limit = Gauge('osu_api_connection_limit', 'Most connections the session opens at once')
+            limit.set(connector.limit)
+
+            metrics += [connections, limit]
+
+        if self.keyPool is not None:
+            healthy = Gauge('osu_api_keys_healthy', 'Keys of the key pool in rotation')
+            healthy.set(len(self.keyPool.healthyKeys))
+
+            metrics.append(healthy)
+
+        if self.scheduler is not None:
+            queued = Gauge('osu_api_scheduler_queued', 'Calls waiting for the scheduler by priority class', ('class',))
+            dropped = Counter('osu_api_scheduler_dropped_total', 'Calls dropped after their deadline by priority class',
+                              ('class',))
+            for cls in self.scheduler.shares:
+                queued.set(self.scheduler.queued(cls), cls)
+                dropped.inc(cls, amount=self.scheduler.dropped[cls])
+
+            metrics += [queued, dropped]
+
+        return metrics
+
+    def _openSession(self):
+        connector = aiohttp.TCPConnector(limit=self.connectionLimit, keepalive_timeout=max(60, self.keepAlive or 0),
+                                         use_dns_cache=True, ttl_dns_cache=600, enable_cleanup_closed=True)
+        self.session = aiohttp.ClientSession(connector=connector)
+
+    async def _ping(self):
+        '''Keyless request that opens or refreshes a connection without using the rate limit'''
+        try:
+            async with self.session.head(self.API_URL, allow_redirects=False) as resp:
+                await resp.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.logger.debug(f'Connection warm up failed: {e!r}')
+
+    async def _keepConnections(self):
+        while True:
+            await asyncio.sleep(max(0, self._lastSent + self.keepAlive - monotonic()))
+
+            if monotonic() - self._lastSent >= self.keepAlive:
+                await self._ping()
+                self._lastSent = monotonic()
+
+    async def start(self):
+        '''Opens the session if the client owns it and warms up connections to osu!'''
+        if self.session is None:
+            self._openSession()
+
+        if self.ownsSession:
+            await asyncio.gather(*[self._ping() for _ in range(self.warmConnections)])
+
+        if self.keepAlive is not None and self._keepAliveTask is None:
+            self._keepAliveTask = self.loop.create_task(self._keepConnections())
+
+        return self
+
+    async def close(self):
+        '''Writes out everything still buffered and closes the session if the client owns it'''
+        if self._keepAliveTask is not None:
+            self._keepAliveTask.cancel()
+            self._keepAliveTask = None
+
+        if self.scheduler is not None:
+            self.scheduler.close()
+
+        if self.callLog is not None:
+            await self.callLog.close()
+
+        if self.ownsSession and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
 
     async def getBeatmaps(self, since=None, beatmapset=None, beatmap=None, user=None, IDMode=None,
-                          mode=None, includeConverted=False, bmHash=None, limit=500):
+                          mode=None, includeConverted=False, bmHash=None, limit=500, frame=False, raw=False):
         args = {}
         if since is not None:
             args['since'] = since.strftime('%Y-%m-%d')
@@ -719,9 +1458,9 @@ class OsuAPI:
             if IDMode is not None:
                 args['type'] = IDMode
         if mode is not None:
-            args['m'] = mode.value
+            args['m'] = Modes(mode).value
 
-            if str(mode) != '0':
+            if args['m'] != 0:
                 if includeConverted:
                     args['a'] = 1
         if bmHash is not None:
@@ -732,16 +1471,39 @@ class OsuAPI:
 
         args['limit'] = limit
 
-        resp = await self._APICall('get_beatmaps', args)
+        resp = None
+
+        stored = self.store is not None and since is None and user is None and mode is None
+        if stored and sum(x is not None for x in (beatmapset, beatmap, bmHash)) == 1:
+            resp = self.store.getBeatmaps(beatmapset=beatmapset, beatmap=beatmap, bmHash=bmHash)
+
+        if resp is not None:
+            resp = resp[:limit]
+        else:
+            resp = await self._APICall('get_beatmaps', args)
 
-        bms = []
+            if self.store is not None and 'a' not in args:
+                # A set is only known to be complete if the limit did not cut it short
+                complete = stored and beatmap is None and bmHash is None and len(resp) < limit
+                self.store.putBeatmaps(resp, beatmapset=beatmapset if complete else None)
 
-        for datum in resp:
-            bms.append(self.beatmapCls(self, **datum))
+        if raw:
+            return resp
+
+        with self.metrics.phase('get_beatmaps', 'build'):
+            if frame:
+                return self.beatmapFrameCls.fromRows(resp)
+
+            bms = []
+
+            converted = args['m'] if 'a' in args else None
+
+            for datum in resp:
+                bms.append(self._intern(self._liveBeatmaps, (int(datum['beatmap_id']), converted), self.beatmapCls, datum))
 
         return bms
 
-    async def getUser(self, user, mode=None, IDMode=None, eventDays=1):
+    async def getUser(self, user, mode=None, IDMode=None, eventDays=1, raw=False):
         if isinstance(user, User):
             user = user.ID
             IDMode = 'id'
@@ -749,7 +1511,7 @@ class OsuAPI:
         args = {'u': user}
 
         if mode is not None:
-            args['m'] = mode.value
+            args['m'] = Modes(mode).value
 
         if IDMode in {'string', 'id', None}:
             if IDMode is not None:
@@ -762,11 +1524,29 @@ class OsuAPI:
         else:
             raise ArgumentError('mode', mode, 'Integer[1, 31]')
 
-        resp = await self._APICall('get_user', args)
+        resp = None
+
+        if self.store is not None:
+            row = self.store.getUser(user, args.get('m', 0), IDMode, eventDays)
+            if row is not None:
+                resp = [row]
+
+        if resp is None:
+            resp = await self._APICall('get_user', args)
+
+            if self.store is not None and resp:
+                self.store.putUser(resp[0], args.get('m', 0), eventDays)
+
+        if not resp:
+            raise APIError(f'error: get_user: {user} not found')
+
+        if raw:
+            return resp[0]
 
-        return self.userCls(self, **resp[0])
+        with self.metrics.phase('get_user', 'build'):
+            return self._intern(self._liveUsers, (int(resp[0]['user_id']), args.get('m', 0)), self.userCls, resp[0])
 
-    async def getScores(self, beatmap, user=None, mode=0, mods=None, IDMode=None, limit=50):
+    async def getScores(self, beatmap, user=None, mode=0, mods=None, IDMode=None, limit=50, frame=False, raw=False):
         if isinstance(beatmap, Beatmap):
             beatmap = beatmap.beatmapID
         args = {'b': beatmap}
@@ -780,21 +1560,28 @@ class OsuAPI:
                 args['type'] = IDMode
 
         if mode is not None:
-            args['m'] = mode.value
+            args['m'] = Modes(mode).value
 
         if mods is not None:
-            if isinstance(mods, Mods):
-                mods = mods.value
-            args['mods'] = str(mods)
+            args['mods'] = str(Mods.getValue(mods))
 
         if limit < 1 or limit > 100 or int(limit) - limit != 0:
             raise ArgumentError('limit', limit, 'Integer[1-100]')
 
         args['limit'] = limit
 
-        return [self.scoreCls(self, **s) for s in await self._APICall('get_scores', args)]
+        resp = await self._APICall('get_scores', args)
 
-    async def getUserBest(self, user, mode=0, limit=10, IDMode=None):
+        if raw:
+            return resp
+
+        with self.metrics.phase('get_scores', 'build'):
+            if frame:
+                return self.scoreFrameCls.fromRows(resp, beatmapID=beatmap)
+
+            return [self.scoreCls(self, **dict(s, beatmap_id=beatmap)) for s in resp]
+
+    async def getUserBest(self, user, mode=0, limit=10, IDMode=None, frame=False, raw=False):
         if isinstance(user, User):
             user = user.ID
             IDMode = 'id'
@@ -802,7 +1589,7 @@ class OsuAPI:
         args = {'u': user}
 
         if mode is not None:
-            args['m'] = mode.value
+            args['m'] = Modes(mode).value
 
         if limit < 1 or limit > 100 or int(limit) - limit != 0:
             raise ArgumentError('limit', limit, 'Integer[1-100]')
@@ -812,9 +1599,18 @@ class OsuAPI:
         if IDMode is not None:
             args['type'] = IDMode
 
-        return [self.scoreCls(self, **s) for s in await self._APICall('get_user_best', args)]
+        resp = await self._APICall('get_user_best', args)
+
+        if raw:
+            return resp
 
-    async def getUserRecent(self, user, mode=0, limit=10, IDMode=None):
+        with self.metrics.phase('get_user_best', 'build'):
+            if frame:
+                return self.scoreFrameCls.fromRows(resp)
+
+            return [self.scoreCls(self, **s) for s in resp]
+
+    async def getUserRecent(self, user, mode=0, limit=10, IDMode=None, frame=False, raw=False):
         if isinstance(user, User):
             user = user.ID
             IDMode = 'id'
@@ -822,7 +1618,7 @@ class OsuAPI:
         args = {'u': user}
 
         if mode is not None:
-            args['m'] = mode.value
+            args['m'] = Modes(mode).value
 
         if limit < 1 or limit > 50 or int(limit) - limit != 0:
             raise ArgumentError('limit', limit, 'Integer[1-100]')
@@ -832,23 +1628,207 @@ class OsuAPI:
         if IDMode is not None:
             args['type'] = IDMode
 
-        return [self.scoreCls(self, **s) for s in await self._APICall('get_user_recent', args)]
+        resp = await self._APICall('get_user_recent', args)
 
-    async def getReplay(self, beatmap, user, mode=0):
-        await self.replaySemaphore.acquire()
+        if raw:
+            return resp
 
-        task = self.loop.create_task(self.reserveReplay())
+        with self.metrics.phase('get_user_recent', 'build'):
+            if frame:
+                return self.scoreFrameCls.fromRows(resp)
 
-        self.pastCalls.add(task)
+            return [self.scoreCls(self, **s) for s in resp]
 
-        task.add_done_callback(self.removeReplayCall)
+    async def getReplay(self, beatmap, user, mode=0, decode=False, scoreKey=None):
+        '''Returns the base64 replay data or, if `decode`, a `Replay` decoded off the event loop
 
+        `scoreKey` identifies the score the replay should belong to. The replay cache is only used with one,
+        as osu! always answers with the replay of the current best score'''
         if isinstance(user, User):
             user = user.ID
 
         if isinstance(beatmap, Beatmap):
             beatmap = beatmap.beatmapID
 
-        args = {'m': mode, 'b': beatmap, 'u': user}
+        data = None
+
+        cached = self.replayCache is not None and scoreKey is not None
+
+        if cached:
+            data = self.replayCache.get(beatmap, user, mode, scoreKey)
+            if data is not None:
+                self.logger.debug(f'Replay: {beatmap} {user} {mode} served from the replay cache')
+                self.metrics.calls.inc('get_replay', 'cached')
+
+        if data is None:
+            await self.replayLimiter.acquire()
+
+            args = {'m': mode, 'b': beatmap, 'u': user}
+
+            data = (await self._APICall('get_replay', args))['content']
+
+            if cached:
+                data = b64decode(data)
+                self.replayCache.put(beatmap, user, data, mode, scoreKey)
+
+        if decode:
+            return await self.loop.run_in_executor(None, decodeReplay, data)
+
+        # Cached replays are kept as LZMA data, the API hands out base64
+        return data if isinstance(data, str) else b64encode(data).decode('ascii')
+
+    async def _bulk(self, jobs, ordered, concurrency):
+        '''Runs `jobs`, pairs of `[(index, key), ...]` and a coroutine function returning `{key: value}`,
+        on `concurrency` workers and yields a `BulkResult` per key'''
+        results = asyncio.Queue()
+        jobs = iter(jobs)
+
+        async def worker():
+            try:
+                for items, fetch in jobs:
+                    try:
+                        found = await fetch()
+                    except Exception as e:
+                        for index, key in items:
+                            results.put_nowait((index, BulkResult(key, None, e)))
+                        continue
+
+                    for index, key in items:
+                        if key in found:
+                            results.put_nowait((index, BulkResult(key, found[key], None)))
+                        else:
+                            results.put_nowait((index, BulkResult(key, None, APIError(f'{key} not found'))))
+            finally:
+                results.put_nowait(None)
+
+        workers = [self.loop.create_task(worker()) for _ in range(max(1, concurrency))]
+        running = len(workers)
+
+        buffered = {}
+        nextIndex = 0
+
+        try:
+            while running:
+                item = await results.get()
+
+                if item is None:
+                    running -= 1
+                    continue
+
+                index, result = item
+
+                if not ordered:
+                    yield result
+                    continue
+
+                buffered[index] = result
+                while nextIndex in buffered:
+                    yield buffered.pop(nextIndex)
+                    nextIndex += 1
+        finally:
+            for task in workers:
+                task.cancel()
+
+    async def getUsers(self, users, mode=None, IDMode=None, eventDays=1, ordered=False, concurrency=8):
+        '''Fetches every distinct user of `users`, ids, names or `User`s, and yields a `BulkResult` for each
+        in completion order or, if `ordered`, in input order'''
+        keys = {}
+        for user in users:
+            if isinstance(user, User):
+                keys.setdefault((user.ID, 'id'), len(keys))
+            else:
+                keys.setdefault((user, IDMode), len(keys))
+
+        def job(index, user, userIDMode):
+            async def fetch():
+                return {user: await self.getUser(user, mode=mode, IDMode=userIDMode, eventDays=eventDays)}
+
+            return [(index, user)], fetch
+
+        jobs = (job(index, user, userIDMode) for (user, userIDMode), index in keys.items())
+
+        async for result in self._bulk(jobs, ordered, concurrency):
+            yield result
+
+    async def getBeatmapsByIds(self, beatmaps, ordered=False, concurrency=8):
+        '''Fetches every distinct beatmap of `beatmaps`, ids or `Beatmap`s, and yields a `BulkResult` for each
+        in completion order or, if `ordered`, in input order. Beatmaps known to share a set, through `Beatmap`s
+        or `Event`s, are fetched with a single call'''
+        indices = {}
+        sets = {}
+        for beatmap in beatmaps:
+            if isinstance(beatmap, (Beatmap, Event)):
+                beatmapID = beatmap.beatmapID
+                beatmapsetID = beatmap.beatmapsetID
+            else:
+                beatmapID = int(beatmap)
+                beatmapsetID = None
+
+            if beatmapID not in indices:
+                indices[beatmapID] = len(indices)
+                sets.setdefault(beatmapsetID, []).append(beatmapID)
+
+        def job(items, **args):
+            async def fetch():
+                return {int(bm.beatmapID): bm for bm in await self.getBeatmaps(**args)}
+
+            return [(indices[beatmapID], beatmapID) for beatmapID in items], fetch
+
+        def jobs():
+            for beatmapsetID, items in sets.items():
+                if beatmapsetID is not None and len(items) > 1:
+                    yield job(items, beatmapset=beatmapsetID)
+                else:
+                    for beatmapID in items:
+                        yield job([beatmapID], beatmap=beatmapID)
+
+        async for result in self._bulk(jobs(), ordered, concurrency):
+            yield result
+
+    async def prefetch(self, objs, *relations, concurrency=8):
+        '''Fills the `relations` of every model of `objs`, `'beatmap'` of `Score`s and `Event`s, `'user'` of `Score`s
+        and `'creator'` of `Beatmap`s, with as few deduplicated calls as possible so that `.beatmap`, `.user` and
+        `.creator` can be used right away. Returns `objs`. Related objects that can not be fetched stay `None`'''
+        for relation in relations:
+            if relation not in self.RELATIONS:
+                raise ArgumentError('relation', relation, f'{tuple(self.RELATIONS)}')
+
+        for relation in relations:
+            slot, idSlot = self.RELATIONS[relation]
+
+            # id -> models waiting for it
+            waiting = {}
+            for obj in objs:
+                if getattr(obj, slot, None) is None and getattr(obj, idSlot, None) is not None:
+                    waiting.setdefault(int(getattr(obj, idSlot)), []).append(obj)
+
+            found = {}
+            missing = []
+            for ID, models in waiting.items():
+                live = self.lookupBeatmap(ID) if relation == 'beatmap' else self.lookupUser(ID)
+                if live is not None:
+                    found[ID] = live
+                elif relation == 'beatmap' and isinstance(models[0], Event):
+                    # Events know their set, which lets beatmaps of one set share a call
+                    missing.append(models[0])
+                else:
+                    missing.append(ID)
+
+            if missing:
+                if relation == 'beatmap':
+                    results = self.getBeatmapsByIds(missing, concurrency=concurrency)
+                else:
+                    results = self.getUsers(missing, IDMode='id', concurrency=concurrency)
+
+                async for result in results:
+                    if result.error is None:
+                        found[int(result.key)] = result.value
+                    else:
+                        self.logger.debug(f'Prefetch: {relation} {result.key} failed with {result.error!r}')
+
+            for ID, models in waiting.items():
+                if ID in found:
+                    for obj in models:
+                        setattr(obj, slot, found[ID])
 
-        return (await self._APICall('get_replay', args))['content']
+        return objs
@@ -0,0 +1,322 @@
+import asyncio
+
+from collections import deque
+
+from contextlib import contextmanager
+
+from hashlib import sha256
+
+import math
+
+import mmap
+
+import os
+
+import struct
+
+import tempfile
+
+from time import monotonic
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+__all__ = ['RateLimiter', 'TokenBucketLimiter', 'AdaptiveRateLimiter', 'SlidingWindowLimiter', 'SharedRateLimiter']
+
+
+def _wholeSlots(rate, period):
+    '''`rate` rounded up to whole slots with `period` stretched to keep the same average rate'''
+    if rate <= 0:
+        return rate, period
+
+    if rate == int(rate):
+        return int(rate), period
+
+    slots = math.ceil(rate)
+    return slots, period * slots / rate
+
+
+class RateLimiter:
+    '''Base class for the rate limiters used by `OsuAPI`
+
+    Subclasses implement `tryAcquire` which either takes a slot and returns `0`
+    or returns the exact number of seconds until a slot frees up.'''
+
+    def __init__(self, rate, period=60):
+        if rate <= 0:
+            raise ValueError(f'Invalid rate {rate}')
+        if period <= 0:
+            raise ValueError(f'Invalid period {period}')
+
+        self.rate = rate
+        self.period = period
+
+        self._lock = None
+
+    def tryAcquire(self):
+        raise NotImplementedError
+
+    @property
+    def timeUntilFree(self):
+        raise NotImplementedError
+
+    @property
+    def locked(self):
+        return self.timeUntilFree > 0
+
+    @property
+    def waiting(self):
+        '''Whether calls are queued in `acquire`'''
+        return self._lock is not None and self._lock.locked()
+
+    @property
+    def effectiveRate(self):
+        '''Calls per `period` currently allowed'''
+        return self.rate
+
+    def feedback(self, status, elapsed):
+        '''Called after every request with its HTTP status and time taken, both `None` if it failed without a response'''
+        pass
+
+    async def acquire(self):
+        '''Waits until a slot is free and takes it
+
+        Waiters queue on a fair lock so only the head of the queue is ever sleeping on a timer'''
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            wait = self.tryAcquire()
+            while wait > 0:
+                await asyncio.sleep(wait)
+                wait = self.tryAcquire()
+
+
+class TokenBucketLimiter(RateLimiter):
+    '''Allows `rate` calls per `period` on average with bursts of up to `burst` calls'''
+
+    def __init__(self, rate, period=60, burst=None):
+        super().__init__(rate, period)
+
+        if burst is None:
+            burst = rate
+        if burst < 1:
+            raise ValueError(f'Invalid burst {burst}')
+
+        self.burst = burst
+
+        self._tokens = float(burst)
+        self._last = monotonic()
+
+    @property
+    def refillRate(self):
+        '''Tokens gained per second'''
+        return self.rate / self.period
+
+    def _refill(self):
+        now = monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.refillRate)
+        self._last = now
+
+    def tryAcquire(self):
+        self._refill()
+
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0
+
+        return (1 - self._tokens) / self.refillRate
+
+    @property
+    def timeUntilFree(self):
+        self._refill()
+
+        if self._tokens >= 1:
+            return 0
+
+        return (1 - self._tokens) / self.refillRate
+
+
+class AdaptiveRateLimiter(TokenBucketLimiter):
+    '''Token bucket whose rate adapts to the responses of osu!, additive increase multiplicative decrease
+
+    Starts at `rate` calls per `period` and gains about `increase` calls per period for every period of
+    healthy responses, up to `ceiling`. A 429, a 5xx, a failed request or a smoothed latency above
+    `latencyFactor` times the best seen multiplies the rate by `decrease`, down to `floor`, at most once
+    every `holdoff` seconds so a burst of failures counts as one.'''
+
+    def __init__(self, rate=60, period=60, ceiling=None, floor=1, increase=1, decrease=0.5, latencyFactor=3,
+                 holdoff=5, burst=None):
+        super().__init__(rate, period, burst)
+
+        if ceiling is None:
+            ceiling = rate
+        if not 0 < floor <= rate <= ceiling:
+            raise ValueError(f'Invalid rate {rate} for floor {floor} and ceiling {ceiling}')
+        if not 0 < decrease < 1:
+            raise ValueError(f'Invalid decrease {decrease}')
+
+        self.ceiling = ceiling
+        self.floor = floor
+        self.increase = increase
+        self.decrease = decrease
+        self.latencyFactor = latencyFactor
+        self.holdoff = holdoff
+
+        self.latency = None
+        self.bestLatency = None
+
+        self._decreasedAt = None
+
+    def _observe(self, elapsed):
+        '''Updates the smoothed latency, returns whether it is congested'''
+        if elapsed is None:
+            return False
+
+        self.latency = elapsed if self.latency is None else 0.8 * self.latency + 0.2 * elapsed
+        self.bestLatency = self.latency if self.bestLatency is None else min(self.bestLatency, self.latency)
+
+        return self.latencyFactor is not None and self.latency > self.latencyFactor * self.bestLatency
+
+    def feedback(self, status, elapsed):
+        congested = self._observe(elapsed)
+
+        if status is None or status == 429 or status >= 500 or congested:
+            now = monotonic()
+            if self._decreasedAt is not None and now - self._decreasedAt < self.holdoff:
+                return
+
+            self._decreasedAt = now
+            self._refill()
+            self.rate = max(self.floor, self.rate * self.decrease)
+            # Spend the saved up burst too, it is what got us here
+            self._tokens = min(self._tokens, 0)
+            return
+
+        self._refill()
+        self.rate = min(self.ceiling, self.rate + self.increase / self.rate)
+
+
+class SlidingWindowLimiter(RateLimiter):
+    '''Allows at most `rate` calls in any window of `period` seconds. A fractional `rate` is rounded up
+    and `period` stretched to match, 0.5 calls per 60 seconds is 1 call per 120 seconds'''
+
+    def __init__(self, rate, period=60):
+        super().__init__(*_wholeSlots(rate, period))
+
+        self._calls = deque(maxlen=self.rate)
+
+    def tryAcquire(self):
+        wait = self.timeUntilFree
+
+        if wait <= 0:
+            self._calls.append(monotonic())
+
+        return wait
+
+    @property
+    def timeUntilFree(self):
+        if len(self._calls) < self._calls.maxlen:
+            return 0
+
+        return max(0, self._calls[0] + self.period - monotonic())
+
+
+class SharedRateLimiter(RateLimiter):
+    '''Sliding window limiter stored in a memory mapped file so that every `OsuAPI`, in any process on
+    this machine, using the same file shares one budget. Requires `fcntl` (POSIX only)'''
+
+    _header = struct.Struct('<qq')
+    _stamp = struct.Struct('<d')
+
+    def __init__(self, path, rate, period=60):
+        if fcntl is None:
+            raise RuntimeError('SharedRateLimiter requires fcntl')
+
+        super().__init__(*_wholeSlots(rate, period))
+
+        self.path = path
+
+        self._slots = self.rate
+        size = self._header.size + self._stamp.size * self._slots
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._map = None
+
+        try:
+            with self._fileLock():
+                existing = os.fstat(self._fd).st_size
+                if existing == 0:
+                    os.ftruncate(self._fd, size)
+                elif existing != size:
+                    raise ValueError(f'{path} is shared with a different rate')
+
+                self._map = mmap.mmap(self._fd, size)
+
+                slots, _ = self._header.unpack_from(self._map)
+                if slots == 0:
+                    self._header.pack_into(self._map, 0, self._slots, 0)
+                elif slots != self._slots:
+                    raise ValueError(f'{path} is shared with rate {slots}, not {self._slots}')
+        except BaseException:
+            self.close()
+            raise
+
+    @classmethod
+    def forKey(cls, key, rate=60, period=60, directory=None):
+        '''Returns a limiter shared by everything using `key` on this machine'''
+        if directory is None:
+            directory = tempfile.gettempdir()
+
+        name = sha256(key.encode()).hexdigest()[:16]
+
+        return cls(os.path.join(directory, f'osu-{name}.rate'), rate, period)
+
+    @contextmanager
+    def _fileLock(self):
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _waitAt(self, head):
+        oldest, = self._stamp.unpack_from(self._map, self._header.size + self._stamp.size * head)
+
+        now = monotonic()
+
+        # A stamp from the future was taken before a reboot reset the monotonic clock
+        if oldest == 0 or oldest > now:
+            return 0
+
+        return max(0, oldest + self.period - now)
+
+    def tryAcquire(self):
+        with self._fileLock():
+            _, head = self._header.unpack_from(self._map)
+
+            wait = self._waitAt(head)
+
+            if wait <= 0:
+                self._stamp.pack_into(self._map, self._header.size + self._stamp.size * head, monotonic())
+                self._header.pack_into(self._map, 0, self._slots, (head + 1) % self._slots)
+
+            return wait
+
+    @property
+    def timeUntilFree(self):
+        with self._fileLock():
+            _, head = self._header.unpack_from(self._map)
+            return self._waitAt(head)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,154 @@
+from base64 import b64decode
+
+from concurrent.futures import ProcessPoolExecutor
+
+import lzma
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+__all__ = ['Replay', 'ReplayStream', 'iterReplay', 'decodeReplay', 'decodeReplays']
+
+
+def _requireNumpy():
+    if np is None:
+        raise ImportError('Replays require numpy, install it with `pip install osu[replays]`')
+
+
+class Replay:
+    '''Cursor frames of a replay as NumPy arrays
+
+    `timeDelta` is the milliseconds since the previous frame, `x` and `y` the cursor position in osu!pixels
+    and `keys` the pressed buttons (M1 1, M2 2, K1 5, K2 10, smoke 16 in standard). `seed` is the RNG seed
+    stored in the last frame of newer replays, or `None`.'''
+
+    __slots__ = ('timeDelta', 'x', 'y', 'keys', 'seed')
+
+    # Time delta of the frame carrying the seed
+    SEED_FRAME = -12345
+
+    def __init__(self, timeDelta, x, y, keys, seed=None):
+        self.timeDelta = timeDelta
+        self.x = x
+        self.y = y
+        self.keys = keys
+        self.seed = seed
+
+    @classmethod
+    def fromText(cls, text):
+        '''Parses `w|x|y|z,` frames'''
+        _requireNumpy()
+
+        text = text.strip().rstrip(',')
+
+        if not text:
+            return cls.concat([])
+
+        frames = np.array(text.replace('|', ',').split(','), dtype=np.float64).reshape(-1, 4)
+
+        seed = None
+        if frames[-1, 0] == cls.SEED_FRAME:
+            seed = int(frames[-1, 3])
+            frames = frames[:-1]
+
+        return cls(frames[:, 0].astype(np.int32), frames[:, 1].astype(np.float32), frames[:, 2].astype(np.float32),
+                   frames[:, 3].astype(np.int32), seed)
+
+    @classmethod
+    def concat(cls, replays):
+        _requireNumpy()
+
+        replays = list(replays)
+        seed = next((r.seed for r in reversed(replays) if r.seed is not None), None)
+
+        def column(name, dtype):
+            return np.concatenate([getattr(r, name) for r in replays] or [np.empty(0, dtype=dtype)])
+
+        return cls(column('timeDelta', np.int32), column('x', np.float32), column('y', np.float32),
+                   column('keys', np.int32), seed)
+
+    @property
+    def time(self):
+        '''Milliseconds since the start of the replay of every frame'''
+        return np.cumsum(self.timeDelta, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.timeDelta)
+
+    def __repr__(self):
+        return f'Replay({len(self)} frames, seed={self.seed})'
+
+
+class ReplayStream:
+    '''Decompresses and parses a replay as its LZMA data arrives, so long replays never exist as one string
+
+    `feed` takes compressed bytes and returns a `Replay` of the frames completed by them.'''
+
+    def __init__(self):
+        _requireNumpy()
+
+        self._decompressor = lzma.LZMADecompressor(lzma.FORMAT_ALONE)
+        self._partial = ''
+
+    def feed(self, data):
+        text = self._partial + self._decompressor.decompress(data).decode('ascii')
+
+        # Only complete frames are parsed, the rest waits for the next chunk
+        end = text.rfind(',') + 1
+        self._partial = text[end:]
+
+        return Replay.fromText(text[:end])
+
+    def close(self):
+        '''Returns the frames left once every chunk was fed'''
+        text, self._partial = self._partial, ''
+
+        return Replay.fromText(text)
+
+
+def _compressed(content):
+    '''LZMA data of `content`, a base64 `str` as returned by get_replay or the raw LZMA `bytes`'''
+    if isinstance(content, str):
+        return b64decode(content)
+
+    return content
+
+
+def iterReplay(content, chunkSize=1 << 16):
+    '''Yields a `Replay` per `chunkSize` bytes of compressed data of `content`, see `decodeReplay`'''
+    stream = ReplayStream()
+
+    if isinstance(content, str):
+        # Whole base64 quanta only, 4 characters to 3 bytes
+        step = chunkSize // 3 * 4
+        chunks = (b64decode(content[i:i + step]) for i in range(0, len(content), step))
+    else:
+        chunks = (content[i:i + chunkSize] for i in range(0, len(content), chunkSize))
+
+    for chunk in chunks:
+        replay = stream.feed(chunk)
+        if len(replay):
+            yield replay
+
+    replay = stream.close()
+    if len(replay) or replay.seed is not None:
+        yield replay
+
+
+def decodeReplay(content):
+    '''Decodes `content`, a base64 `str` as returned by `OsuAPI.getReplay` or the raw LZMA `bytes`, into a `Replay`'''
+    _requireNumpy()
+
+    return Replay.fromText(lzma.decompress(_compressed(content), lzma.FORMAT_ALONE).decode('ascii'))
+
+
+def decodeReplays(contents, executor=None, chunksize=16):
+    '''Decodes many replays across processes, `executor` defaults to a `ProcessPoolExecutor` with a worker per CPU'''
+    if executor is not None:
+        return list(executor.map(decodeReplay, contents, chunksize=chunksize))
+
+    with ProcessPoolExecutor() as executor:
+        return list(executor.map(decodeReplay, contents, chunksize=chunksize))
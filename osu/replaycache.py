@@ -0,0 +1,137 @@
+from hashlib import sha256
+
+import mmap
+
+import os
+
+import sqlite3
+
+from time import time
+
+
+__all__ = ['ReplayCache']
+
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS replays (
+    beatmap_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    mode INTEGER NOT NULL,
+    score_key TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    stored REAL NOT NULL,
+    PRIMARY KEY (beatmap_id, user_id, mode, score_key)
+);
+CREATE INDEX IF NOT EXISTS replays_digest ON replays (digest);
+
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS blobs_accessed ON blobs (accessed);
+'''
+
+
+class ReplayCache:
+    '''On disk cache of replays consulted by `OsuAPI.getReplay` before using the replay rate limit
+
+    Replays are stored as their LZMA data under `objects/ab/cdef...`, named by its SHA-256, and indexed by
+    beatmap, user, mode and `scoreKey`, the identity of the score the replay belongs to. A lookup without a
+    `scoreKey` returns the replay stored last for the beatmap, user and mode, which may belong to an older
+    best, so `OsuAPI` only uses the cache with a `scoreKey`. Once the blobs take more than `maxBytes` the
+    least recently read are evicted.'''
+
+    def __init__(self, directory, maxBytes=1 << 30):
+        self.directory = directory
+        self.maxBytes = maxBytes
+
+        os.makedirs(os.path.join(directory, 'objects'), exist_ok=True)
+
+        self.db = sqlite3.connect(os.path.join(directory, 'index.sqlite'))
+        self.db.executescript(_SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def _path(self, digest):
+        return os.path.join(self.directory, 'objects', digest[:2], digest[2:])
+
+    @property
+    def currentBytes(self):
+        return self.db.execute('SELECT COALESCE(SUM(size), 0) FROM blobs').fetchone()[0]
+
+    def get(self, beatmap, user, mode=0, scoreKey=None):
+        '''Returns the LZMA data of a replay as a read only memory map of its blob, or `None`'''
+        if scoreKey is None:
+            row = self.db.execute('SELECT digest FROM replays WHERE beatmap_id = ? AND user_id = ? AND mode = ? '
+                                  'ORDER BY stored DESC LIMIT 1', (int(beatmap), int(user), int(mode))).fetchone()
+        else:
+            row = self.db.execute('SELECT digest FROM replays WHERE beatmap_id = ? AND user_id = ? AND mode = ? '
+                                  'AND score_key = ?', (int(beatmap), int(user), int(mode), str(scoreKey))).fetchone()
+
+        if row is None:
+            return None
+
+        digest, = row
+
+        try:
+            with open(self._path(digest), 'rb') as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # The blob is gone or empty, forget it so the replay is fetched again
+            self._forget([digest])
+            return None
+
+        with self.db:
+            self.db.execute('UPDATE blobs SET accessed = ? WHERE digest = ?', (time(), digest))
+
+        return data
+
+    def put(self, beatmap, user, data, mode=0, scoreKey=None):
+        '''Stores the LZMA data of a replay, returns its digest'''
+        digest = sha256(data).hexdigest()
+        path = self._path(digest)
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+            temp = f'{path}.{os.getpid()}.tmp'
+            with open(temp, 'wb') as f:
+                f.write(data)
+            os.replace(temp, path)
+
+        with self.db:
+            self.db.execute('INSERT OR REPLACE INTO blobs VALUES (?, ?, ?)', (digest, len(data), time()))
+            self.db.execute('INSERT OR REPLACE INTO replays VALUES (?, ?, ?, ?, ?, ?)',
+                            (int(beatmap), int(user), int(mode), '' if scoreKey is None else str(scoreKey), digest,
+                             time()))
+
+        self._evict()
+
+        return digest
+
+    def _forget(self, digests):
+        with self.db:
+            self.db.executemany('DELETE FROM replays WHERE digest = ?', [(d,) for d in digests])
+            self.db.executemany('DELETE FROM blobs WHERE digest = ?', [(d,) for d in digests])
+
+        for digest in digests:
+            try:
+                os.remove(self._path(digest))
+            except FileNotFoundError:
+                pass
+
+    def _evict(self):
+        excess = self.currentBytes - self.maxBytes
+        if excess <= 0:
+            return
+
+        evicted = []
+        for digest, size in self.db.execute('SELECT digest, size FROM blobs ORDER BY accessed'):
+            if excess <= 0:
+                break
+            evicted.append(digest)
+            excess -= size
+
+        self._forget(evicted)
@@ -0,0 +1,91 @@
+import asyncio
+
+import random
+
+from time import monotonic
+
+import aiohttp
+
+
+__all__ = ['RetryPolicy', 'CircuitBreaker']
+
+
+class RetryPolicy:
+    '''Retries of failed API calls, passed to `OsuAPI` as `retry`
+
+    Calls failing with one of `retryOn`, or an error flagged `retryable` such as a 5xx or non JSON
+    response, are retried up to `retries` times. The delay before retry `n` is drawn uniformly from
+    `0` to `min(maxDelay, base * 2 ** n)`. Every retry takes a new slot from the rate limiter.'''
+
+    RETRY_ON = (asyncio.TimeoutError, aiohttp.ClientError)
+
+    def __init__(self, retries=3, base=0.5, maxDelay=30, retryOn=None):
+        self.retries = retries
+        self.base = base
+        self.maxDelay = maxDelay
+        self.retryOn = self.RETRY_ON if retryOn is None else tuple(retryOn)
+
+    def retryable(self, error):
+        return isinstance(error, self.retryOn) or getattr(error, 'retryable', False)
+
+    def shouldRetry(self, attempt, error):
+        return attempt < self.retries and self.retryable(error)
+
+    def delay(self, attempt):
+        return random.uniform(0, min(self.maxDelay, self.base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    '''Fails calls fast while osu! is down, passed to `OsuAPI` as `breaker`
+
+    The circuit opens after `failureThreshold` failures in a row. Once `resetTimeout` seconds have
+    passed a single probe call is let through, closing the circuit again if it succeeds.'''
+
+    def __init__(self, failureThreshold=5, resetTimeout=30):
+        self.failureThreshold = failureThreshold
+        self.resetTimeout = resetTimeout
+
+        self.state = 'closed'
+        self.failures = 0
+        self.openedAt = None
+
+        self._probing = False
+
+    @property
+    def retryAfter(self):
+        '''Seconds until a probe is let through, `0` when closed'''
+        if self.state == 'closed':
+            return 0
+
+        return max(0, self.openedAt + self.resetTimeout - monotonic())
+
+    def allow(self):
+        '''Whether a call may go out now, taking the probe if the circuit is half open'''
+        if self.state == 'closed':
+            return True
+
+        if self.state == 'open' and self.retryAfter <= 0:
+            self.state = 'half-open'
+
+        if self.state == 'half-open' and not self._probing:
+            self._probing = True
+            return True
+
+        return False
+
+    def record(self, ok):
+        '''Records the outcome of an allowed call, `None` if it ended without telling whether osu! is up'''
+        self._probing = False
+
+        if ok is None:
+            return
+
+        if ok:
+            self.state = 'closed'
+            self.failures = 0
+            return
+
+        self.failures += 1
+        if self.state == 'half-open' or self.failures >= self.failureThreshold:
+            self.state = 'open'
+            self.openedAt = monotonic()
@@ -0,0 +1,221 @@
+import asyncio
+
+from collections import OrderedDict, deque
+
+from contextlib import contextmanager
+
+import contextvars
+
+import math
+
+from time import monotonic
+
+from .osu import APIError
+
+
+__all__ = ['DeadlineExceeded', 'requestPriority', 'PriorityScheduler']
+
+
+class DeadlineExceeded(APIError):
+    '''Raised when a queued call was not started before its deadline'''
+    pass
+
+
+# (priority class, tenant, absolute monotonic deadline) of the calls made in the current context
+_priority = contextvars.ContextVar('osuPriority', default=(None, None, None))
+
+
+@contextmanager
+def requestPriority(cls=None, tenant=None, deadline=None):
+    '''Makes API calls in the block, and tasks started from it, run as `cls` on behalf of `tenant`
+
+    Calls not started within `deadline` seconds of entering the block raise `DeadlineExceeded`.
+    Arguments left as `None` are inherited from an enclosing block.'''
+    outerCls, outerTenant, outerDeadline = _priority.get()
+
+    if deadline is not None:
+        deadline = monotonic() + deadline
+        if outerDeadline is not None:
+            deadline = min(deadline, outerDeadline)
+    else:
+        deadline = outerDeadline
+
+    token = _priority.set((cls or outerCls, outerTenant if tenant is None else tenant, deadline))
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class PriorityScheduler:
+    '''Hands out the slots of a rate limiter by priority class, passed to `OsuAPI` as `scheduler`
+
+    `classes` lists `(name, share)` from highest to lowest priority. A class's share of the rate
+    is reserved for it, other classes can not use it even while it is idle, so its calls find
+    free slots immediately. The rest of the budget goes to the highest priority class waiting.
+    Within a class, tenants take turns. The limiter defaults to the limiter of the `OsuAPI`.'''
+
+    CLASSES = (('interactive', 0.2), ('normal', 0), ('background', 0))
+
+    def __init__(self, limiter=None, classes=None, default='normal'):
+        if classes is None:
+            classes = self.CLASSES
+
+        classes = OrderedDict(classes)
+
+        if any(share < 0 for share in classes.values()) or sum(classes.values()) > 1:
+            raise ValueError(f'Invalid shares {dict(classes)}')
+        if default not in classes:
+            raise ValueError(f'Unknown default class {default}')
+
+        self.limiter = limiter
+        self.shares = classes
+        self.default = default
+
+        # Per class, tenant -> waiting futures
+        self._queues = {name: OrderedDict() for name in classes}
+        # Per class, when its calls within the last period were granted
+        self._granted = {name: deque() for name in classes}
+
+        self.dropped = {name: 0 for name in classes}
+
+        self._dispatcher = None
+        self._wakeup = None
+
+    def queued(self, cls):
+        '''Number of calls of `cls` waiting, including ones already past their deadline'''
+        return sum(len(futures) for futures in self._queues[cls].values())
+
+    async def acquire(self, cls=None, tenant=None, deadline=None):
+        '''Waits for a slot as `cls` on behalf of `tenant` for at most `deadline` seconds, like `requestPriority`.
+        Arguments left as `None` default to the context set by `requestPriority`'''
+        contextCls, contextTenant, contextDeadline = _priority.get()
+
+        cls = cls or contextCls or self.default
+        tenant = contextTenant if tenant is None else tenant
+        deadline = contextDeadline if deadline is None else monotonic() + deadline
+
+        if cls not in self._queues:
+            raise ValueError(f'Unknown priority class {cls}')
+
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+
+        future = asyncio.get_event_loop().create_future()
+        self._queues[cls].setdefault(tenant, deque()).append(future)
+        self._wakeup.set()
+
+        try:
+            await asyncio.wait_for(future, None if deadline is None else deadline - monotonic())
+        except asyncio.TimeoutError:
+            self.dropped[cls] += 1
+            raise DeadlineExceeded(f'{cls} call of {tenant} was not started before its deadline') from None
+
+    def acquireNow(self, cls=None):
+        '''Takes a slot as `cls` only if one is free and no call is waiting, returns whether it did'''
+        cls = cls or _priority.get()[0] or self.default
+
+        if cls not in self._queues:
+            raise ValueError(f'Unknown priority class {cls}')
+
+        now = monotonic()
+        self._expire(now)
+
+        if any([self._waiting(name) for name in self.shares]) or self.limiter.waiting or not self._allowed(cls):
+            return False
+
+        if self.limiter.tryAcquire() > 0:
+            return False
+
+        self._granted[cls].append(now)
+        return True
+
+    def _waiting(self, cls):
+        '''Drops finished futures from the head of every tenant queue of `cls`, returns whether any are left'''
+        queue = self._queues[cls]
+
+        for tenant in list(queue):
+            futures = queue[tenant]
+            while futures and futures[0].done():
+                futures.popleft()
+            if not futures:
+                del queue[tenant]
+
+        return bool(queue)
+
+    def _expire(self, now):
+        for granted in self._granted.values():
+            while granted and granted[0] <= now - self.limiter.period:
+                granted.popleft()
+
+    def _allowed(self, cls):
+        '''Whether granting `cls` a slot still leaves room for the unused reservations of the other classes'''
+        rate = self.limiter.rate
+
+        used = sum(len(granted) for granted in self._granted.values())
+        # Reservations are whole slots, a share of less than one slot reserves nothing
+        held = sum(max(0, math.floor(share * rate) - len(self._granted[name]))
+                   for name, share in self.shares.items() if name != cls)
+
+        return held == 0 or used + 1 + held <= rate
+
+    def _pick(self):
+        waiting = [cls for cls in self.shares if self._waiting(cls)]
+
+        for cls in waiting:
+            if self._allowed(cls):
+                return cls
+
+        # Nothing granted within the window can free up, the reservations can not be met at this rate
+        if waiting and not any(self._granted.values()):
+            return waiting[0]
+
+        return None
+
+    def _grant(self, cls, now):
+        queue = self._queues[cls]
+
+        tenant, futures = next(iter(queue.items()))
+        futures.popleft().set_result(None)
+
+        # Round robin, the tenant goes to the back of the class
+        queue.move_to_end(tenant)
+
+        self._granted[cls].append(now)
+
+    async def _sleep(self, timeout):
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _dispatch(self):
+        while True:
+            if not any([self._waiting(cls) for cls in self.shares]):
+                await self._sleep(None)
+                continue
+
+            now = monotonic()
+            self._expire(now)
+
+            cls = self._pick()
+            if cls is None:
+                # Every waiting class is held back by reservations, wait for the oldest grant to leave the window
+                oldest = min((granted[0] for granted in self._granted.values() if granted), default=None)
+                await self._sleep(None if oldest is None else oldest + self.limiter.period - now)
+                continue
+
+            wait = self.limiter.tryAcquire()
+            if wait > 0:
+                await self._sleep(wait)
+                continue
+
+            self._grant(cls, now)
+
+    def close(self):
+        '''Stops dispatching, it restarts with the next call'''
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
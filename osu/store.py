@@ -0,0 +1,105 @@
+import json
+
+import sqlite3
+
+from time import time
+
+from .osu import ApprovedStatus
+
+
+__all__ = ['SQLiteStore']
+
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS beatmaps (
+    beatmap_id INTEGER PRIMARY KEY,
+    beatmapset_id INTEGER NOT NULL,
+    file_md5 TEXT,
+    row TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS beatmaps_beatmapset_id ON beatmaps (beatmapset_id);
+CREATE INDEX IF NOT EXISTS beatmaps_file_md5 ON beatmaps (file_md5);
+
+CREATE TABLE IF NOT EXISTS beatmapsets (
+    beatmapset_id INTEGER PRIMARY KEY
+);
+
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER NOT NULL,
+    mode INTEGER NOT NULL,
+    username TEXT NOT NULL COLLATE NOCASE,
+    event_days INTEGER NOT NULL,
+    fetched REAL NOT NULL,
+    row TEXT NOT NULL,
+    PRIMARY KEY (user_id, mode)
+);
+CREATE INDEX IF NOT EXISTS users_username ON users (username, mode);
+'''
+
+
+class SQLiteStore:
+    '''Persistent store of raw API rows consulted by `OsuAPI` before calling the API
+
+    Only ranked, approved and loved beatmaps are stored since they can no longer change.
+    Beatmapsets are only served once all of their difficulties were stored together.
+    Users are served for `userMaxAge` seconds.'''
+
+    PERMANENT = {ApprovedStatus.Ranked, ApprovedStatus.Approved, ApprovedStatus.Loved}
+
+    def __init__(self, path, userMaxAge=3600):
+        self.path = path
+        self.userMaxAge = userMaxAge
+
+        self.db = sqlite3.connect(path)
+        self.db.executescript(_SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def _rows(self, query, *args):
+        return [json.loads(row) for row, in self.db.execute(query, args)]
+
+    def getBeatmaps(self, beatmapset=None, beatmap=None, bmHash=None):
+        '''Returns the stored rows matching exactly one of the lookups or `None` if they are unknown'''
+        if beatmap is not None:
+            rows = self._rows('SELECT row FROM beatmaps WHERE beatmap_id = ?', int(beatmap))
+        elif bmHash is not None:
+            rows = self._rows('SELECT row FROM beatmaps WHERE file_md5 = ?', bmHash)
+        elif beatmapset is not None:
+            complete = self.db.execute('SELECT 1 FROM beatmapsets WHERE beatmapset_id = ?', (int(beatmapset),)).fetchone()
+            if complete is None:
+                return None
+            rows = self._rows('SELECT row FROM beatmaps WHERE beatmapset_id = ? ORDER BY beatmap_id', int(beatmapset))
+        else:
+            return None
+
+        return rows or None
+
+    def putBeatmaps(self, rows, beatmapset=None):
+        '''Stores the permanent rows, if `beatmapset` is given the rows are every difficulty of that set'''
+        permanent = [row for row in rows if ApprovedStatus(int(row['approved'])) in self.PERMANENT]
+
+        with self.db:
+            self.db.executemany('INSERT OR REPLACE INTO beatmaps VALUES (?, ?, ?, ?)',
+                                [(int(row['beatmap_id']), int(row['beatmapset_id']), row['file_md5'], json.dumps(row))
+                                 for row in permanent])
+
+            if beatmapset is not None and permanent and len(permanent) == len(rows):
+                self.db.execute('INSERT OR IGNORE INTO beatmapsets VALUES (?)', (int(beatmapset),))
+
+    def getUser(self, user, mode=0, IDMode=None, eventDays=1):
+        '''Returns the stored row of a user if it is recent enough or `None`'''
+        if IDMode == 'id' or (IDMode is None and str(user).isdigit()):
+            query = 'SELECT row FROM users WHERE user_id = ? AND mode = ? AND event_days = ? AND fetched > ?'
+            user = int(user)
+        else:
+            query = 'SELECT row FROM users WHERE username = ? AND mode = ? AND event_days = ? AND fetched > ?'
+
+        rows = self._rows(query, user, mode, eventDays, time() - self.userMaxAge)
+
+        return rows[0] if rows else None
+
+    def putUser(self, row, mode=0, eventDays=1):
+        with self.db:
+            self.db.execute('INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?, ?, ?)',
+                            (int(row['user_id']), mode, row['username'], eventDays, time(), json.dumps(row)))
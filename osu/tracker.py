@@ -0,0 +1,306 @@
+import asyncio
+
+from collections import namedtuple
+
+import heapq
+
+from time import monotonic
+
+from .osu import Beatmap, Modes, User
+from .ratelimit import TokenBucketLimiter
+from .scheduler import requestPriority
+
+
+__all__ = ['LeaderboardChange', 'UserActivity', 'LeaderboardTracker', 'UserWatcher']
+
+
+class LeaderboardChange(namedtuple('LeaderboardChange', ['beatmapID', 'kind', 'score'])):
+    '''A score that appeared on (`kind` `'new'`) or changed on (`'changed'`) a tracked leaderboard'''
+    pass
+
+
+class UserActivity(namedtuple('UserActivity', ['userID', 'kind', 'item'])):
+    '''A new `Event` (`kind` `'event'`) or recent `Score` (`'play'`) of a watched user'''
+    pass
+
+
+def _rowHash(row):
+    return hash(tuple(sorted(row.items())))
+
+
+class _Watched:
+    '''Polling state of one tracked beatmap or user'''
+    __slots__ = ('ID', 'interval', 'primed', 'polls', 'changes')
+
+    def __init__(self, ID, interval):
+        self.ID = ID
+        self.interval = interval
+
+        self.primed = False
+
+        self.polls = 0
+        self.changes = 0
+
+
+class _Board(_Watched):
+    __slots__ = ('snapshot',)
+
+    def __init__(self, ID, interval):
+        super().__init__(ID, interval)
+
+        # Score identity -> hash of its row at the last poll
+        self.snapshot = {}
+
+    def diff(self, rows):
+        '''Returns `(kind, row)` for every new or changed row and replaces the snapshot'''
+        snapshot = {}
+        changed = []
+
+        for row in rows:
+            identity = row.get('score_id') or row['user_id']
+            rowHash = _rowHash(row)
+            snapshot[identity] = rowHash
+
+            previous = self.snapshot.get(identity)
+            if previous is None:
+                changed.append(('new', row))
+            elif previous != rowHash:
+                changed.append(('changed', row))
+
+        self.snapshot = snapshot
+
+        return changed
+
+
+class _HighWaterMark:
+    '''Latest date seen in a stream of dated rows with the hashes of the rows at that date, so rows
+    sharing the latest date are told apart without remembering any older row'''
+    __slots__ = ('date', 'hashes')
+
+    def __init__(self):
+        self.date = None
+        self.hashes = frozenset()
+
+    def advance(self, rows):
+        '''Returns the rows past the mark and moves the mark to the latest of them'''
+        fresh = [row for row in rows
+                 if self.date is None or row['date'] > self.date
+                 or (row['date'] == self.date and _rowHash(row) not in self.hashes)]
+
+        latest = max((row['date'] for row in fresh), default=None)
+        if latest is not None:
+            kept = self.hashes if latest == self.date else frozenset()
+            self.hashes = kept | {_rowHash(row) for row in fresh if row['date'] == latest}
+            self.date = latest
+
+        return fresh
+
+
+class _User(_Watched):
+    __slots__ = ('events', 'plays')
+
+    def __init__(self, ID, interval):
+        super().__init__(ID, interval)
+
+        self.events = _HighWaterMark()
+        self.plays = _HighWaterMark()
+
+
+class _Tracker:
+    '''Polls watched items, each after its own interval, within a budget of `rate` polls per `period`
+
+    The interval of an item is shortened when a poll found something and grown by `backoff` when it did not,
+    between `minInterval` and `maxInterval` seconds, so the budget goes to the busiest items first.'''
+
+    watchedCls = _Watched
+
+    def __init__(self, osuAPI, rate=30, period=60, minInterval=60, maxInterval=6 * 3600, backoff=1.5,
+                 emitInitial=False, priority='background'):
+        self.osuAPI = osuAPI
+
+        self.limiter = TokenBucketLimiter(rate, period, burst=1)
+        self.minInterval = minInterval
+        self.maxInterval = maxInterval
+        self.backoff = backoff
+        self.emitInitial = emitInitial
+        self.priority = priority
+
+        self.watched = {}
+
+        # (due, sequence, id, watched), entries of removed or re-added items are skipped when they come up
+        self._heap = []
+        self._sequence = 0
+        self._wakeup = asyncio.Event()
+
+    def _id(self, item):
+        return int(item)
+
+    def _schedule(self, watched, due):
+        self._sequence += 1
+        heapq.heappush(self._heap, (due, self._sequence, watched.ID, watched))
+
+    def add(self, item):
+        '''Starts watching `item`, polling it as soon as the budget allows'''
+        ID = self._id(item)
+
+        if ID not in self.watched:
+            watched = self.watched[ID] = self.watchedCls(ID, self.minInterval)
+            self._schedule(watched, monotonic())
+            self._wakeup.set()
+
+    def remove(self, item):
+        self.watched.pop(self._id(item), None)
+
+    def __len__(self):
+        return len(self.watched)
+
+    def __aiter__(self):
+        return self.track()
+
+    async def _next(self):
+        '''Waits until the most overdue item is due and returns it'''
+        while True:
+            while self._heap and self.watched.get(self._heap[0][2]) is not self._heap[0][3]:
+                heapq.heappop(self._heap)
+
+            wait = self._heap[0][0] - monotonic() if self._heap else None
+            if wait is not None and wait <= 0:
+                return heapq.heappop(self._heap)[3]
+
+            # Woken early when an item is added
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _call(self, method, *args, **kwargs):
+        '''Calls an `OsuAPI` method within the budget and as `priority`'''
+        await self.limiter.acquire()
+
+        with requestPriority(self.priority):
+            return await method(*args, **kwargs)
+
+    async def poll(self, watched):
+        '''Returns what changed since the last poll of `watched`'''
+        raise NotImplementedError
+
+    async def track(self):
+        while True:
+            watched = await self._next()
+
+            try:
+                found = await self.poll(watched)
+            except Exception as e:
+                self.osuAPI.logger.warning(f'{type(self).__name__}: polling {watched.ID} failed with {e!r}')
+                watched.interval = min(self.maxInterval, watched.interval * self.backoff)
+                self._schedule(watched, monotonic() + watched.interval)
+                continue
+
+            # The item may have been removed while it was polled
+            if self.watched.get(watched.ID) is not watched:
+                continue
+
+            primed = watched.primed
+            watched.primed = True
+            watched.polls += 1
+
+            if primed:
+                watched.changes += len(found)
+
+                if found:
+                    watched.interval = max(self.minInterval, watched.interval / 2)
+                else:
+                    watched.interval = min(self.maxInterval, watched.interval * self.backoff)
+
+            self._schedule(watched, monotonic() + watched.interval)
+
+            if primed or self.emitInitial:
+                for change in found:
+                    yield change
+
+
+class LeaderboardTracker(_Tracker):
+    '''Watches beatmap leaderboards and yields a `LeaderboardChange` for every new or changed score.
+    Meant to be iterated with `async for`
+
+    Polls never exceed `rate` per `period` on top of the limits of the `OsuAPI`. Each map is polled again
+    after its own interval, halved when its leaderboard changed and grown by `backoff` when it did not,
+    between `minInterval` and `maxInterval` seconds. The first poll of a map only takes a snapshot unless
+    `emitInitial`. Polls run as `priority` if the API has a scheduler.'''
+
+    watchedCls = _Board
+
+    def __init__(self, osuAPI, beatmaps=(), rate=30, period=60, mode=Modes.standard, limit=50, minInterval=60,
+                 maxInterval=6 * 3600, backoff=1.5, emitInitial=False, priority='background'):
+        super().__init__(osuAPI, rate, period, minInterval, maxInterval, backoff, emitInitial, priority)
+
+        self.mode = mode
+        self.limit = limit
+
+        for beatmap in beatmaps:
+            self.add(beatmap)
+
+    @property
+    def boards(self):
+        return self.watched
+
+    def _id(self, beatmap):
+        return int(beatmap.beatmapID if isinstance(beatmap, Beatmap) else beatmap)
+
+    async def poll(self, board):
+        rows = await self._call(self.osuAPI.getScores, board.ID, mode=self.mode, limit=self.limit, raw=True)
+
+        return [LeaderboardChange(board.ID, kind, self.osuAPI.scoreCls(self.osuAPI, **dict(row, beatmap_id=board.ID)))
+                for kind, row in board.diff(rows)]
+
+
+class UserWatcher(_Tracker):
+    '''Watches users and yields a `UserActivity` for every event and recent play not seen before.
+    Meant to be iterated with `async for`
+
+    Users are polled like `LeaderboardTracker` polls maps, users that were just active soonest. Each poll
+    fetches the events of the last `eventDays` days and the last `recentLimit` plays, only items past the
+    user's high-water mark are yielded, so only the rows sharing the latest date are remembered per user.'''
+
+    watchedCls = _User
+
+    def __init__(self, osuAPI, users=(), rate=30, period=60, mode=Modes.standard, eventDays=1, recentLimit=10,
+                 events=True, plays=True, minInterval=60, maxInterval=6 * 3600, backoff=1.5, emitInitial=False,
+                 priority='background'):
+        super().__init__(osuAPI, rate, period, minInterval, maxInterval, backoff, emitInitial, priority)
+
+        self.mode = mode
+        self.eventDays = eventDays
+        self.recentLimit = recentLimit
+        self.events = events
+        self.plays = plays
+
+        for user in users:
+            self.add(user)
+
+    @property
+    def users(self):
+        return self.watched
+
+    def _id(self, user):
+        return int(user.ID if isinstance(user, User) else user)
+
+    async def poll(self, user):
+        found = []
+
+        if self.events:
+            row = await self._call(self.osuAPI.getUser, user.ID, mode=self.mode, IDMode='id',
+                                   eventDays=self.eventDays, raw=True)
+
+            for event in user.events.advance(row['events']):
+                found.append(UserActivity(user.ID, 'event', self.osuAPI.eventCls(self.osuAPI, **event)))
+
+        if self.plays:
+            rows = await self._call(self.osuAPI.getUserRecent, user.ID, mode=self.mode, limit=self.recentLimit,
+                                    IDMode='id', raw=True)
+
+            for play in user.plays.advance(rows):
+                found.append(UserActivity(user.ID, 'play', self.osuAPI.scoreCls(self.osuAPI, **play)))
+
+        return found
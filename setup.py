@@ -18,5 +18,13 @@ setup(
     packages=['osu'],
     install_requires=[
         'aiohttp==3.7.4'
-    ]
+    ],
+    extras_require={
+        'frames': ['numpy'],
+        'replays': ['numpy'],
+        'speed': ['orjson']
+    },
+    entry_points={
+        'console_scripts': ['osu-calllog = osu.analyze:main']
+    }
 )
@@ -0,0 +1,58 @@
+import asyncio
+
+import os
+
+import tempfile
+
+import unittest
+
+from osu import CallLog
+
+
+class CallLogTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'calls.log')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    async def testWritesRecords(self):
+        log = CallLog(self.path, format='jsonl')
+        log.record(0, 1.0, 'get_user', {'u': 1}, 200, 0.1)
+        log.record(1, 1.0, 'get_user', {'u': 2})
+        await log.close()
+
+        self.assertEqual(CallLog(self.path, format='jsonl').lastCallID, 1)
+
+    async def testFailedWriteKeepsDraining(self):
+        log = CallLog(os.path.join(self.directory.name, 'missing', 'calls.log'))
+        log.record(0, 1.0, 'get_user', {'u': 1}, 200, 0.1)
+        await asyncio.wait_for(log.flush(), 1)
+
+        self.assertEqual(log.dropped, 1)
+
+        # The writer survived and writes once the directory exists
+        os.mkdir(os.path.join(self.directory.name, 'missing'))
+        log.record(1, 1.0, 'get_user', {'u': 1}, 200, 0.1)
+        await asyncio.wait_for(log.close(), 1)
+
+        self.assertEqual(log.dropped, 1)
+        self.assertEqual(CallLog(log.path).lastCallID, 1)
+
+    async def testDeadWriterIsRestarted(self):
+        log = CallLog(self.path)
+        log.record(0, 1.0, 'get_user', {'u': 1}, 200, 0.1)
+        await log.flush()
+
+        log._writer.cancel()
+        await asyncio.sleep(0)
+
+        log.record(1, 1.0, 'get_user', {'u': 1}, 200, 0.1)
+        await asyncio.wait_for(log.close(), 1)
+
+        self.assertEqual(CallLog(self.path).lastCallID, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
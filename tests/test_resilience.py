@@ -0,0 +1,96 @@
+import asyncio
+
+import json
+
+import unittest
+
+from osu import CircuitBreaker, DeadlineExceeded, OsuAPI, PriorityScheduler, ResponseError, SlidingWindowLimiter, \
+    requestPriority
+
+
+class FakeResponse:
+    def __init__(self, session):
+        self.session = session
+
+    async def __aenter__(self):
+        await asyncio.sleep(self.session.delay)
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    @property
+    def status(self):
+        return self.session.status
+
+    async def read(self):
+        return json.dumps(self.session.body).encode()
+
+
+class FakeSession:
+    '''Answers every request with `status` and `body` as JSON after `delay` seconds'''
+
+    def __init__(self, status=200, body=(), delay=0):
+        self.status = status
+        self.body = body
+        self.delay = delay
+
+        self.calls = []
+
+    def get(self, url, params=None):
+        self.calls.append((url, params))
+
+        return FakeResponse(self)
+
+
+class BreakerTest(unittest.IsolatedAsyncioTestCase):
+    def makeAPI(self, session, **kwargs):
+        return OsuAPI(session, 'key', loggingLevel=50, **kwargs)
+
+    async def testDeadlineDoesNotCloseBreaker(self):
+        session = FakeSession(503)
+        breaker = CircuitBreaker(failureThreshold=2, resetTimeout=0.05)
+        api = self.makeAPI(session, limiter=SlidingWindowLimiter(2, 1), scheduler=PriorityScheduler(),
+                           breaker=breaker)
+
+        for _ in range(2):
+            with self.assertRaises(ResponseError):
+                await api.getUser(1, IDMode='id')
+
+        self.assertEqual(breaker.state, 'open')
+
+        await asyncio.sleep(0.05)
+
+        # The probe waits for the saturated limiter past its deadline without reaching osu!
+        with requestPriority(deadline=0.05):
+            with self.assertRaises(DeadlineExceeded):
+                await api.getUser(1, IDMode='id')
+
+        self.assertNotEqual(breaker.state, 'closed')
+        self.assertEqual(len(session.calls), 2)
+
+        await api.close()
+
+    async def testErrorMessageMeansOsuIsUp(self):
+        session = FakeSession(200, {'error': 'Please provide a valid API key.'})
+        breaker = CircuitBreaker(failureThreshold=1)
+        api = self.makeAPI(session, breaker=breaker)
+
+        with self.assertRaises(ResponseError):
+            await api.getUser(1, IDMode='id')
+
+        self.assertEqual(breaker.state, 'closed')
+
+    async def testTimeoutOpensBreaker(self):
+        session = FakeSession(200, [], delay=1)
+        breaker = CircuitBreaker(failureThreshold=1)
+        api = self.makeAPI(session, breaker=breaker, timeout=0.01)
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await api.getUser(1, IDMode='id')
+
+        self.assertEqual(breaker.state, 'open')
+
+
+if __name__ == '__main__':
+    unittest.main()
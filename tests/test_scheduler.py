@@ -0,0 +1,97 @@
+import asyncio
+
+from time import monotonic
+
+import unittest
+
+from osu import DeadlineExceeded, PriorityScheduler, SlidingWindowLimiter, requestPriority
+
+
+class SchedulerTest(unittest.IsolatedAsyncioTestCase):
+    def tearDown(self):
+        if getattr(self, 'scheduler', None) is not None:
+            self.scheduler.close()
+
+    def makeScheduler(self, rate, period=1, **kwargs):
+        self.scheduler = PriorityScheduler(SlidingWindowLimiter(rate, period), **kwargs)
+        return self.scheduler
+
+    async def testLowRateGrantsPromptly(self):
+        # A reservation of a fraction of a slot must not hold back every other class
+        scheduler = self.makeScheduler(1)
+
+        await asyncio.wait_for(scheduler.acquire(), 0.5)
+        await asyncio.wait_for(scheduler.acquire('background'), 1.5)
+
+    async def testReservationHoldsBackOtherClasses(self):
+        scheduler = self.makeScheduler(10)
+
+        background = [asyncio.ensure_future(scheduler.acquire('background')) for _ in range(10)]
+        await asyncio.sleep(0.1)
+
+        # interactive keeps 2 of the 10 slots
+        self.assertEqual(sum(task.done() for task in background), 8)
+
+        await asyncio.wait_for(scheduler.acquire('interactive'), 0.1)
+
+        for task in background:
+            task.cancel()
+
+    async def testDeadlineDropsCall(self):
+        scheduler = self.makeScheduler(1)
+        await scheduler.acquire()
+
+        with requestPriority('background', deadline=0.05):
+            with self.assertRaises(DeadlineExceeded):
+                await scheduler.acquire()
+
+        self.assertEqual(scheduler.dropped['background'], 1)
+
+    async def testDeadlineArgumentIsRelative(self):
+        scheduler = self.makeScheduler(1)
+        await scheduler.acquire()
+
+        started = monotonic()
+        with self.assertRaises(DeadlineExceeded):
+            await scheduler.acquire(deadline=0.05)
+
+        self.assertLess(monotonic() - started, 0.5)
+
+        self.assertEqual(scheduler.dropped['normal'], 1)
+
+    async def testTenantsTakeTurns(self):
+        scheduler = self.makeScheduler(100)
+        order = []
+
+        async def call(tenant):
+            await scheduler.acquire(tenant=tenant)
+            order.append(tenant)
+
+        await asyncio.gather(*[call('a') for _ in range(3)], *[call('b') for _ in range(3)])
+
+        self.assertEqual(order, ['a', 'b', 'a', 'b', 'a', 'b'])
+
+    async def testHigherClassFirst(self):
+        scheduler = self.makeScheduler(1, classes=(('interactive', 0), ('normal', 0), ('background', 0)))
+        await scheduler.acquire()
+
+        order = []
+
+        async def call(cls):
+            await scheduler.acquire(cls)
+            order.append(cls)
+
+        tasks = [asyncio.ensure_future(call(cls)) for cls in ('background', 'normal', 'interactive')]
+        await asyncio.sleep(0.05)
+
+        self.assertEqual(order, [])
+
+        await asyncio.wait_for(tasks[2], 1.5)
+        self.assertEqual(order, ['interactive'])
+
+        for task in tasks:
+            task.cancel()
+
+
+if __name__ == '__main__':
+    unittest.main()